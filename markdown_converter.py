@@ -7,37 +7,2208 @@ with real-time preview capabilities. Built using only Python standard library mo
 """
 
 import tkinter as tk
-from tkinter import filedialog, messagebox, scrolledtext
+from tkinter import filedialog, messagebox, scrolledtext, ttk
+import base64
+import gzip
+import io
+import json
+import math
+import mimetypes
+import multiprocessing
 import os
 import re
+import shutil
+import sqlite3
+import struct
+import sys
 import webbrowser
 import html
+import itertools
+import socketserver
 import tempfile
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import unquote
 
 
-class MarkdownConverter:
+BLOCK_SEPARATOR = '\n\n'
+LIST_ITEM_PATTERN = re.compile(r'^(?:\d+\.|[-*+]) ')
+FENCE_PATTERN = re.compile(r'^```', re.MULTILINE)
+HEADING_PATTERN = re.compile(r'^(#{1,6}) (.*?)$', re.MULTILINE)
+WORD_PATTERN = re.compile(r'\w+')
+HEADING_ID_PATTERN = re.compile(r'(<h[1-6] id=")([^"]*)(")')
+NON_BMP_PATTERN = re.compile('[\U00010000-\U0010FFFF]')
+# Characters that later conversion rules would treat as Markdown inside the
+# attributes of generated tags; browsers decode the entities back
+ATTRIBUTE_ESCAPES = str.maketrans({'*': '&#42;', '_': '&#95;', '`': '&#96;'})
+
+RENDER_WORKERS = 2
+RENDER_CACHE_BUDGET = 64 * 1024 * 1024
+RENDER_POLL_INTERVAL = 50
+
+PARALLEL_THRESHOLD = 4 * 1024 * 1024
+# Worker processes are spawned rather than forked: conversions start from
+# worker threads of the GUI process, which must not be forked. Choosing the
+# start method needs Python 3.7, so older versions convert sequentially.
+PARALLEL_START_METHOD = 'spawn'
+PARALLEL_SUPPORTED = sys.version_info >= (3, 7)
+PARALLEL_CHUNK_SIZE = 1024 * 1024
+
+CONVERT_BATCH_SIZE = 256
+CONVERT_PENDING_BATCHES = 2 * (os.cpu_count() or 1)
+# A batch stops using its render cache if fewer than CONVERT_CACHE_MIN_HIT_RATE
+# of the first CONVERT_CACHE_SAMPLE block lookups were hits
+CONVERT_CACHE_SAMPLE = 1024
+CONVERT_CACHE_MIN_HIT_RATE = 0.1
+
+OUTPUT_BUFFER_SIZE = 256 * 1024
+# Permissions of newly created output files, instead of mkstemp's private mode
+NEW_FILE_MODE = 0o644
+GZIP_COMPRESS_LEVEL = 9
+
+IMAGE_CACHE_FILE = os.path.join(os.path.expanduser('~'), '.markdown_converter_images.json')
+IMAGE_INLINE_LIMIT = 8 * 1024
+IMAGE_TAG_PATTERN = re.compile(r'<img src="([^"]*)"')
+# Schemes have at least two characters, so Windows drive paths such as
+# C:/images/a.png are treated as local files
+URL_SCHEME_PATTERN = re.compile(r'^(?:[a-zA-Z][a-zA-Z0-9+.-]+:|//)')
+
+METRICS_WINDOW = 1024
+METRICS_HOST = '127.0.0.1'
+METRICS_PORT = 8765
+METRICS_REFRESH_INTERVAL = 1000
+METRICS_PREFIX = 'markdown_converter_'
+
+SEARCH_INDEX_MMAP_SIZE = 256 * 1024 * 1024
+SEARCH_RESULT_LIMIT = 50
+SEARCH_INDEX_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS documents (
+        id INTEGER PRIMARY KEY,
+        path TEXT UNIQUE NOT NULL,
+        title TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS sections (
+        document_id INTEGER NOT NULL,
+        section INTEGER NOT NULL,
+        anchor TEXT NOT NULL,
+        heading TEXT NOT NULL,
+        PRIMARY KEY (document_id, section)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS postings (
+        term TEXT NOT NULL,
+        document_id INTEGER NOT NULL,
+        section INTEGER NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (term, document_id, section)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS postings_document ON postings (document_id);
+"""
+
+SearchResult = namedtuple('SearchResult', ['path', 'title', 'anchor', 'heading', 'hits'])
+
+
+def split_blocks(markdown_text):
+    """
+    Split Markdown text into blocks that can be converted independently.
+
+    Blocks are separated by blank lines, except where the blank line lies
+    inside a fenced code block or an unterminated inline code span, or
+    between two list items, since those constructs span blank lines.
+
+    Args:
+        markdown_text (str): The input Markdown text to split
+
+    Returns:
+        list: The Markdown blocks, in document order
+    """
+    if BLOCK_SEPARATOR not in markdown_text:
+        return [markdown_text]
+
+    blocks = []
+    pending = []
+    fence_open = False
+    code_open = False
+    ends_in_list = False
+
+    for part in markdown_text.split(BLOCK_SEPARATOR):
+        content = part.strip('\n')
+        starts_list = bool(content) and LIST_ITEM_PATTERN.match(content) is not None
+
+        if pending and not (fence_open or code_open or not content or
+                            (ends_in_list and starts_list)):
+            blocks.append(BLOCK_SEPARATOR.join(pending))
+            pending = []
+        pending.append(part)
+
+        if '`' in part:
+            if len(FENCE_PATTERN.findall(part)) % 2:
+                fence_open = not fence_open
+            if part.count('`') % 2:
+                code_open = not code_open
+        if content:
+            last_line = content[content.rfind('\n') + 1:]
+            ends_in_list = LIST_ITEM_PATTERN.match(last_line) is not None
+
+    if pending:
+        blocks.append(BLOCK_SEPARATOR.join(pending))
+    return blocks
+
+
+def heading_anchor(heading_text):
+    """
+    Build the id attribute used to link to a heading.
+
+    Args:
+        heading_text (str): The heading text as written in the Markdown source
+
+    Returns:
+        str: The anchor, made of the lowercased words of the heading
+    """
+    return '-'.join(WORD_PATTERN.findall(heading_text.lower())) or 'section'
+
+
+def unique_anchor(anchor, used_anchors):
+    """
+    Make an anchor unique within a document by numbering repeats.
+
+    Args:
+        anchor (str): The anchor built by heading_anchor
+        used_anchors (dict): The anchors already used in the document, each
+            mapped to the last number tried for it; updated in place
+
+    Returns:
+        str: The anchor for the first use, then anchor-1, anchor-2 and so on
+    """
+    if anchor not in used_anchors:
+        used_anchors[anchor] = 0
+        return anchor
+        
+    number = used_anchors[anchor]
+    while True:
+        number += 1
+        candidate = f'{anchor}-{number}'
+        if candidate not in used_anchors:
+            break
+    used_anchors[anchor] = number
+    used_anchors[candidate] = 0
+    return candidate
+
+
+def number_heading_ids(html_content, used_anchors):
+    """
+    Make the heading ids in converted HTML unique within a document.
+
+    Blocks are converted and cached independently, so repeated headings get
+    their numbers here, in document order, after conversion.
+
+    Args:
+        html_content (str): The HTML of one or more blocks
+        used_anchors (dict): The ids already used earlier in the document, see
+            unique_anchor
+
+    Returns:
+        str: The HTML with repeated heading ids numbered
+    """
+    if '<h' not in html_content:
+        return html_content
+    return HEADING_ID_PATTERN.sub(
+        lambda match: match.group(1) + unique_anchor(match.group(2), used_anchors) + match.group(3),
+        html_content
+    )
+
+
+def render_heading(match):
+    """Render a heading matched by HEADING_PATTERN in escaped Markdown."""
+    level = len(match.group(1))
+    heading_text = match.group(2)
+    anchor = heading_anchor(html.unescape(heading_text)).translate(ATTRIBUTE_ESCAPES)
+    return f'<h{level} id="{anchor}">{heading_text}</h{level}>'
+
+
+def render_code_block(match):
+    """Render a fenced code block matched in escaped Markdown."""
+    return f'<pre><code class="language-{match.group(1)}">{match.group(2)}</code></pre>'
+
+
+def render_image(match):
+    """
+    Render an image matched in escaped Markdown as a lazily loaded img tag.
+
+    Code spans are matched too and returned unchanged, so that image syntax
+    shown as an example in code stays text.
+    """
+    if match.group(1) is not None:
+        return match.group(1)
+    alt_text = match.group(2).translate(ATTRIBUTE_ESCAPES)
+    source = match.group(3).translate(ATTRIBUTE_ESCAPES)
+    title = ''
+    if match.group(4) is not None:
+        title = f' title="{match.group(4).translate(ATTRIBUTE_ESCAPES)}"'
+    return f'<img src="{source}" alt="{alt_text}"{title} loading="lazy">'
+
+
+def render_link(match):
+    """Render a link matched in converted text, leaving code elements unchanged."""
+    if match.group(1) is not None:
+        return match.group(1)
+    return f'<a href="{match.group(3)}">{match.group(2)}</a>'
+
+
+def read_image_size(file):
+    """
+    Read the intrinsic size of a PNG, GIF or JPEG image from its header.
+
+    Args:
+        file: The image file opened in binary mode
+
+    Returns:
+        tuple: (width, height) in pixels, or None for other formats
+    """
+    header = file.read(26)
+    if header.startswith(b'\x89PNG\r\n\x1a\n') and header[12:16] == b'IHDR':
+        return struct.unpack('>II', header[16:24])
+    if header[:6] in (b'GIF87a', b'GIF89a'):
+        return struct.unpack('<HH', header[6:10])
+    if not header.startswith(b'\xff\xd8'):
+        return None
+        
+    # JPEG: walk the segments up to the start-of-frame marker
+    file.seek(2)
+    while True:
+        marker = file.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        if marker[1] in (0xD8, 0x01) or 0xD0 <= marker[1] <= 0xD7:
+            continue
+        length = file.read(2)
+        if len(length) < 2 or struct.unpack('>H', length)[0] < 2:
+            return None
+        if 0xC0 <= marker[1] <= 0xCF and marker[1] not in (0xC4, 0xC8, 0xCC):
+            frame = file.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack('>HH', frame[1:5])
+            return width, height
+        file.seek(struct.unpack('>H', length)[0] - 2, io.SEEK_CUR)
+
+
+# Conversion rules as (trigger, pattern, replacement), applied in order. A rule
+# is skipped when its trigger does not occur in the text, since its pattern
+# cannot match then; this keeps the per-call cost low for short snippets.
+BLOCK_RULES = [
+    ('# ', HEADING_PATTERN, render_heading),
+    ('![', re.compile(r'(`[^`]+`)|!\[([^\]]*)\]\(([^)\s]+)(?: &quot;([^)]*?)&quot;)?\)'), render_image),
+    ('**', re.compile(r'\*\*(.*?)\*\*'), r'<strong>\1</strong>'),
+    ('__', re.compile(r'__(.*?)__'), r'<strong>\1</strong>'),
+    ('*', re.compile(r'\*(.*?)\*'), r'<em>\1</em>'),
+    ('_', re.compile(r'_(.*?)_'), r'<em>\1</em>'),
+    ('`', re.compile(r'`([^`]+)`'), r'<code>\1</code>'),
+    ('```', re.compile(r'^```(\w*)\n(.*?)\n```$', re.MULTILINE | re.DOTALL), render_code_block),
+    ('> ', re.compile(r'^> (.*?)$', re.MULTILINE), r'<blockquote>\1</blockquote>'),
+    ('](', re.compile(r'(<code[^>]*>.*?</code>)|\[([^\]]+)\]\(([^)]+)\)', re.DOTALL), render_link),
+    ('. ', re.compile(r'^(\d+)\. (.*?)$', re.MULTILINE), r'<ol><li>\2</li></ol>'),
+    (' ', re.compile(r'^[-*+] (.*?)$', re.MULTILINE), r'<ul><li>\1</li></ul>'),
+    ('</ol>', re.compile(r'</ol>\s*<ol>'), ''),
+    ('</ul>', re.compile(r'</ul>\s*<ul>'), ''),
+    ('\n\n', re.compile(r'\n\n'), '</p><p>'),
+]
+
+PARAGRAPH_RULES = [
+    ('<p></p>', re.compile(r'<p></p>'), ''),
+    ('<p><h', re.compile(r'<p>(<h[1-6] id="[^"]*">.*?</h[1-6]>)</p>'), r'\1'),
+    ('<p><', re.compile(r'<p>(<(?:ul|ol|blockquote|pre)>.*?</(?:ul|ol|blockquote|pre)>)</p>',
+                        re.DOTALL), r'\1'),
+]
+
+
+def convert_block(block):
+    """
+    Convert a single Markdown block to HTML using custom parsing rules.
+
+    Args:
+        block (str): A Markdown block as produced by split_blocks
+
+    Returns:
+        str: The converted HTML content
+    """
+    html_content = html.escape(block)
+
+    for trigger, pattern, replacement in BLOCK_RULES:
+        if trigger in html_content:
+            html_content = pattern.sub(replacement, html_content)
+
+    html_content = f'<p>{html_content}</p>'
+
+    for trigger, pattern, replacement in PARAGRAPH_RULES:
+        if trigger in html_content:
+            html_content = pattern.sub(replacement, html_content)
+
+    return html_content
+
+
+def chunk_blocks(blocks, chunk_size=PARALLEL_CHUNK_SIZE):
+    """
+    Group consecutive blocks into chunks of roughly chunk_size characters.
+
+    Args:
+        blocks (list): Markdown blocks as produced by split_blocks
+        chunk_size (int): The target number of characters per chunk
+
+    Returns:
+        list: Lists of consecutive blocks, in document order
+    """
+    chunks = []
+    current = []
+    current_size = 0
+    for block in blocks:
+        current.append(block)
+        current_size += len(block)
+        if current_size >= chunk_size:
+            chunks.append(current)
+            current = []
+            current_size = 0
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def convert_chunk(blocks):
+    """
+    Convert a chunk of blocks to HTML. Runs in a worker process.
+
+    Args:
+        blocks (list): Consecutive Markdown blocks
+
+    Returns:
+        list: The HTML for each block, in the same order
+    """
+    return [convert_block(block) for block in blocks]
+
+
+# Process pools shared by all conversions, by number of workers
+PROCESS_POOLS = {}
+PROCESS_POOLS_LOCK = threading.Lock()
+
+
+def get_process_pool(max_workers):
+    """
+    Get the shared process pool with the given number of workers.
+
+    Pools are started on first use and reused afterwards, so only the first
+    large conversion pays for spawning the worker interpreters.
+
+    Args:
+        max_workers (int): Number of worker processes
+
+    Returns:
+        ProcessPoolExecutor: The pool
+    """
+    with PROCESS_POOLS_LOCK:
+        pool = PROCESS_POOLS.get(max_workers)
+        if pool is None:
+            pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context(PARALLEL_START_METHOD)
+            )
+            PROCESS_POOLS[max_workers] = pool
+        return pool
+
+
+def shutdown_process_pools():
+    """Shut down the shared process pools; they are restarted when next needed."""
+    with PROCESS_POOLS_LOCK:
+        pools = list(PROCESS_POOLS.values())
+        PROCESS_POOLS.clear()
+    for pool in pools:
+        pool.shutdown(wait=False)
+
+
+def convert_blocks(blocks, max_workers=None):
+    """
+    Convert blocks to HTML, spreading large inputs over a process pool.
+
+    Blocks are converted independently of each other, so the result is
+    identical whether the chunks run sequentially or in parallel. Results are
+    yielded as soon as their chunk is done, so they can be streamed to a sink.
+
+    Args:
+        blocks (list): Markdown blocks as produced by split_blocks
+        max_workers (int): Number of worker processes, defaults to the CPU count
+
+    Yields:
+        str: The HTML for each block, in the same order
+    """
+    if not PARALLEL_SUPPORTED or sum(len(block) for block in blocks) < PARALLEL_THRESHOLD:
+        max_workers = 1
+    elif max_workers is None:
+        max_workers = os.cpu_count() or 1
+    if max_workers < 2:
+        for block in blocks:
+            yield convert_block(block)
+        return
+
+    pool = get_process_pool(max_workers)
+    try:
+        for converted in pool.map(convert_chunk, chunk_blocks(blocks)):
+            yield from converted
+    except BrokenProcessPool:
+        # A worker died; drop the pool so the next conversion starts a new one
+        with PROCESS_POOLS_LOCK:
+            if PROCESS_POOLS.get(max_workers) is pool:
+                del PROCESS_POOLS[max_workers]
+        raise
+
+
+def convert_markdown(markdown_text, max_workers=None):
+    """
+    Convert Markdown text to HTML without a GUI.
+
+    Documents larger than PARALLEL_THRESHOLD characters are split into chunks
+    at block boundaries and converted in parallel processes on Python 3.7
+    and later.
+
+    Args:
+        markdown_text (str): The input Markdown text to convert
+        max_workers (int): Number of worker processes, defaults to the CPU count
+
+    Returns:
+        str: The converted HTML content
+    """
+    if not markdown_text:
+        return ""
+    used_anchors = {}
+    return ''.join(number_heading_ids(html_content, used_anchors)
+                   for html_content in convert_blocks(split_blocks(markdown_text), max_workers))
+
+
+class LatencyHistogram:
+    """
+    Rolling window of recent durations with percentile summaries.
+
+    Only the latest samples are kept, so percentiles follow the current load
+    rather than the whole lifetime of the process, while the count and sum
+    cover every sample recorded.
+    """
+
+    def __init__(self, window=METRICS_WINDOW):
+        """
+        Initialize an empty histogram.
+
+        Args:
+            window (int): The number of recent samples to keep
+        """
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def record(self, seconds):
+        """Add a duration in seconds."""
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+
+    def percentiles(self, fractions=(0.5, 0.95, 0.99)):
+        """
+        Compute nearest-rank percentiles of the samples in the window.
+
+        The percentile is the smallest sample that at least that fraction
+        of the samples is less than or equal to.
+
+        Args:
+            fractions (tuple): The percentiles to compute, between 0 and 1
+
+        Returns:
+            dict: The duration in seconds for each fraction, 0.0 when empty
+        """
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {fraction: 0.0 for fraction in fractions}
+        # Rounding first keeps float error such as 0.07 * 100 = 7.000000000000001
+        # from pushing the rank one sample up
+        return {
+            fraction: ordered[max(0, math.ceil(round(fraction * len(ordered), 9)) - 1)]
+            for fraction in fractions
+        }
+
+
+class Metrics:
+    """
+    Thread-safe registry of latency histograms, counters and gauges.
+
+    Gauges can also be registered as callables that are read whenever a
+    snapshot is taken, which suits values owned by other objects such as
+    cache sizes.
+    """
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+        self.gauge_readers = {}
+
+    def record(self, name, seconds):
+        """
+        Add a duration to a latency histogram.
+
+        Args:
+            name (str): The histogram name
+            seconds (float): The duration
+        """
+        with self.lock:
+            if name not in self.histograms:
+                self.histograms[name] = LatencyHistogram()
+            self.histograms[name].record(seconds)
+
+    def timer(self, name):
+        """
+        Time a block of code into a latency histogram.
+
+        Args:
+            name (str): The histogram name
+
+        Returns:
+            MetricsTimer: A context manager that records its duration
+        """
+        return MetricsTimer(self, name)
+
+    def increment(self, name, amount=1):
+        """
+        Increase a counter.
+
+        Args:
+            name (str): The counter name
+            amount (int): The amount to add
+        """
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def adjust_gauge(self, name, amount):
+        """
+        Move a gauge up or down.
+
+        Args:
+            name (str): The gauge name
+            amount (int): The amount to add, negative to decrease
+        """
+        with self.lock:
+            self.gauges[name] = self.gauges.get(name, 0) + amount
+
+    def register_gauge(self, name, reader):
+        """
+        Register a gauge whose value is read on demand.
+
+        Args:
+            name (str): The gauge name
+            reader (callable): Returns the current value; called from any thread
+        """
+        with self.lock:
+            self.gauge_readers[name] = reader
+
+    def snapshot(self):
+        """
+        Take a consistent copy of every metric.
+
+        Returns:
+            dict: Histogram summaries, counters and gauges by name
+        """
+        with self.lock:
+            histograms = {
+                name: (histogram.percentiles(), histogram.count, histogram.total)
+                for name, histogram in self.histograms.items()
+            }
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+            gauge_readers = dict(self.gauge_readers)
+            
+        for name, reader in gauge_readers.items():
+            gauges[name] = reader()
+        return {'histograms': histograms, 'counters': counters, 'gauges': gauges}
+
+    def render_text(self):
+        """
+        Format every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics page served at /metrics
+        """
+        snapshot = self.snapshot()
+        lines = []
+        for name, (percentiles, count, total) in sorted(snapshot['histograms'].items()):
+            metric = f'{METRICS_PREFIX}{name}_seconds'
+            lines.append(f'# TYPE {metric} summary')
+            for fraction, seconds in percentiles.items():
+                lines.append(f'{metric}{{quantile="{fraction}"}} {seconds:.6f}')
+            lines.append(f'{metric}_sum {total:.6f}')
+            lines.append(f'{metric}_count {count}')
+        for name, value in sorted(snapshot['counters'].items()):
+            lines.append(f'# TYPE {METRICS_PREFIX}{name}_total counter')
+            lines.append(f'{METRICS_PREFIX}{name}_total {value}')
+        for name, value in sorted(snapshot['gauges'].items()):
+            lines.append(f'# TYPE {METRICS_PREFIX}{name} gauge')
+            lines.append(f'{METRICS_PREFIX}{name} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsTimer:
+    """Context manager that records the duration of its block in a histogram."""
+
+    def __init__(self, metrics, name):
+        """
+        Initialize the timer.
+
+        Args:
+            metrics (Metrics): The registry to record into
+            name (str): The histogram name
+        """
+        self.metrics = metrics
+        self.name = name
+        self.started = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.metrics.record(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    """Serves the metrics of the server's registry at /metrics."""
+
+    def do_GET(self):
+        """Respond with the metrics page, or 404 for any other path."""
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+            
+        body = self.server.metrics.render_text().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Keep scrapes out of the console."""
+
+
+class MetricsServer(socketserver.ThreadingMixIn, HTTPServer):
+    """Local HTTP server exposing a Metrics registry on a background thread."""
+
+    daemon_threads = True
+
+    def __init__(self, metrics, host=METRICS_HOST, port=METRICS_PORT):
+        """
+        Bind the server; call start() to begin serving.
+
+        Args:
+            metrics (Metrics): The registry to expose
+            host (str): The interface to listen on
+            port (int): The port to listen on
+        """
+        self.metrics = metrics
+        super().__init__((host, port), MetricsRequestHandler)
+        self.thread = threading.Thread(target=self.serve_forever, name="metrics", daemon=True)
+
+    def start(self):
+        """Start serving requests in the background."""
+        self.thread.start()
+
+    def stop(self):
+        """Stop serving and release the port."""
+        self.shutdown()
+        self.server_close()
+
+
+class RenderCache:
+    """
+    Per-document cache mapping Markdown blocks to their rendered HTML.
+
+    Entries are kept in least-recently-used order so that the cache can be
+    trimmed when the shared render budget is exceeded. The cache is safe to
+    use from the conversion worker threads.
+    """
+
+    def __init__(self):
+        """Initialize an empty cache."""
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def render_blocks(self, blocks):
+        """
+        Render a sequence of blocks, converting only the misses.
+
+        Misses are converted together, so a large document that is not yet
+        cached is converted in parallel processes as it would be without one.
+
+        Args:
+            blocks (list): Markdown blocks as produced by split_blocks
+
+        Yields:
+            str: The HTML for each block, in the same order
+        """
+        rendered = {}
+        with self.lock:
+            for block in blocks:
+                if block in self.entries:
+                    self.entries.move_to_end(block)
+                    rendered[block] = self.entries[block]
+                    self.hits += 1
+                else:
+                    self.misses += 1
+        
+        misses = [block for block in dict.fromkeys(blocks) if block not in rendered]
+        converted = convert_blocks(misses)
+        for block in blocks:
+            if block not in rendered:
+                rendered[block] = next(converted)
+                self.store(block, rendered[block])
+            yield rendered[block]
+
+    def is_effective(self, sample=CONVERT_CACHE_SAMPLE, min_hit_rate=CONVERT_CACHE_MIN_HIT_RATE):
+        """
+        Check whether the cache pays for its bookkeeping.
+
+        Args:
+            sample (int): Number of lookups to observe before judging
+            min_hit_rate (float): The fraction of lookups that must be hits
+
+        Returns:
+            bool: True until sample lookups were made, then whether enough of
+                them were hits
+        """
+        lookups = self.hits + self.misses
+        return lookups < sample or self.hits >= min_hit_rate * lookups
+
+    def store(self, block, html_content):
+        """
+        Add a rendered block to the cache.
+
+        Args:
+            block (str): The Markdown block
+            html_content (str): The HTML rendered for the block
+        """
+        with self.lock:
+            if block not in self.entries:
+                self.entries[block] = html_content
+                self.size += sys.getsizeof(block) + sys.getsizeof(html_content)
+
+    def trim(self, max_size):
+        """
+        Evict least-recently-used entries until the cache fits in max_size.
+
+        Args:
+            max_size (int): The maximum cache size in bytes
+        """
+        with self.lock:
+            while self.entries and self.size > max_size:
+                block, html_content = self.entries.popitem(last=False)
+                self.size -= sys.getsizeof(block) + sys.getsizeof(html_content)
+
+    def clear(self):
+        """Drop every cached entry."""
+        self.trim(0)
+
+
+class RenderBudget:
+    """
+    Shared memory budget for the render caches of all open documents.
+
+    When the combined size of the caches exceeds the budget, the caches of
+    inactive documents are evicted first, least recently active first, and
+    only then is the active document's cache trimmed.
+    """
+
+    def __init__(self, max_size=RENDER_CACHE_BUDGET):
+        """
+        Initialize the budget.
+
+        Args:
+            max_size (int): The maximum combined cache size in bytes
+        """
+        self.max_size = max_size
+        self.caches = []
+
+    def register(self, cache):
+        """Add a cache to the budget as the most recently active one."""
+        self.caches.append(cache)
+
+    def unregister(self, cache):
+        """Remove a cache from the budget and release its entries."""
+        if cache in self.caches:
+            self.caches.remove(cache)
+        cache.clear()
+
+    def touch(self, cache):
+        """Mark a cache as belonging to the most recently active document."""
+        if cache in self.caches:
+            self.caches.remove(cache)
+            self.caches.append(cache)
+
+    def total_size(self):
+        """Return the combined size of all registered caches in bytes."""
+        return sum(cache.size for cache in self.caches)
+
+    def enforce(self, active_cache=None):
+        """
+        Evict cached renders until the combined size fits in the budget.
+
+        Args:
+            active_cache (RenderCache): The cache of the document in focus
+        """
+        for cache in list(self.caches):
+            if self.total_size() <= self.max_size:
+                return
+            if cache is not active_cache:
+                cache.clear()
+
+        if active_cache is not None:
+            active_cache.trim(self.max_size - (self.total_size() - active_cache.size))
+
+
+class ImageAssets:
+    """
+    Resolves local images referenced by rendered HTML.
+
+    Each local image gets its intrinsic width and height, so browsers can
+    lay out the page before the images load, and small images can be inlined
+    as data URIs to save requests. Dimensions are cached by path and
+    revalidated against the file's modification time and size; the cache can
+    be persisted as JSON between runs.
+    """
+
+    def __init__(self, cache_path=None, inline_limit=0):
+        """
+        Initialize the resolver, loading the persistent cache if there is one.
+
+        Args:
+            cache_path (str): Optional JSON file to load and save dimensions in
+            inline_limit (int): Inline images of at most this many bytes as
+                data URIs; 0 disables inlining
+        """
+        self.cache_path = cache_path
+        self.inline_limit = inline_limit
+        self.dimensions = {}
+        self.dirty = False
+        self.lock = threading.Lock()
+        if cache_path:
+            self.load()
+
+    def load(self):
+        """
+        Load cached dimensions, starting empty if the file is missing or
+        unreadable and skipping entries that are not [mtime_ns, size, width,
+        height] lists.
+        """
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as file:
+                dimensions = json.load(file)
+        except (OSError, ValueError):
+            dimensions = {}
+        if not isinstance(dimensions, dict):
+            dimensions = {}
+        self.dimensions = {
+            path: entry for path, entry in dimensions.items() if self.is_valid_entry(entry)
+        }
+
+    def is_valid_entry(self, entry):
+        """Return True if a cache entry read from disk has the expected shape."""
+        if not isinstance(entry, list) or len(entry) != 4:
+            return False
+        mtime_ns, size, width, height = entry
+        if not all(isinstance(value, int) for value in (mtime_ns, size)):
+            return False
+        return (width is None and height is None) or all(
+            isinstance(value, int) for value in (width, height))
+
+    def save(self):
+        """Write the cached dimensions back to the cache file if they changed."""
+        with self.lock:
+            if not self.cache_path or not self.dirty:
+                return
+            content = json.dumps(self.dimensions)
+            self.dirty = False
+            
+        with AtomicFileSink(self.cache_path) as sink:
+            sink.write(content)
+
+    def image_size(self, path, stat):
+        """
+        Get the intrinsic size of an image, reading its header on a cache miss.
+
+        Args:
+            path (str): The absolute path of the image
+            stat (os.stat_result): The current status of the file
+
+        Returns:
+            tuple: (width, height) in pixels, or None if unknown
+        """
+        with self.lock:
+            entry = self.dimensions.get(path)
+        if entry is not None and entry[:2] == [stat.st_mtime_ns, stat.st_size]:
+            return tuple(entry[2:]) if entry[2] is not None else None
+            
+        with open(path, 'rb') as file:
+            size = read_image_size(file)
+        with self.lock:
+            self.dimensions[path] = [stat.st_mtime_ns, stat.st_size] + list(size or (None, None))
+            self.dirty = True
+        return size
+
+    def resolve_tag(self, match, base_dir):
+        """Add the dimensions of a local image to its tag, inlining it if small."""
+        source = html.unescape(match.group(1))
+        if URL_SCHEME_PATTERN.match(source):
+            return match.group(0)
+            
+        path = os.path.join(base_dir or os.getcwd(), unquote(source.split('#')[0].split('?')[0]))
+        path = os.path.abspath(path)
+        source_attribute = match.group(1)
+        try:
+            stat = os.stat(path)
+            size = self.image_size(path, stat)
+            media_type = mimetypes.guess_type(path)[0]
+            if (self.inline_limit and stat.st_size <= self.inline_limit
+                    and media_type and media_type.startswith('image/')):
+                with open(path, 'rb') as file:
+                    data = base64.b64encode(file.read()).decode('ascii')
+                source_attribute = f'data:{media_type};base64,{data}'
+        except (OSError, struct.error):
+            return match.group(0)
+            
+        tag = f'<img src="{source_attribute}"'
+        if size is not None:
+            tag += f' width="{size[0]}" height="{size[1]}"'
+        return tag
+
+    def resolve(self, html_content, base_dir=None):
+        """
+        Add dimensions to the local images in a piece of rendered HTML.
+
+        Args:
+            html_content (str): HTML produced by the conversion rules
+            base_dir (str): Directory that relative image paths are resolved
+                against, defaulting to the current directory
+
+        Returns:
+            str: The HTML with the image tags completed
+        """
+        return IMAGE_TAG_PATTERN.sub(lambda match: self.resolve_tag(match, base_dir), html_content)
+
+
+class DocumentIndex:
+    """
+    Terms and heading anchors of one document, collected during conversion.
+
+    The document is divided into sections that start at each heading. For
+    every term the index records how often it occurs in each section.
+    """
+
+    def __init__(self):
+        """Initialize an index with a single untitled section."""
+        self.sections = [('', 'Top')]
+        self.terms = {}
+        self.used_anchors = {}
+
+    def title(self):
+        """Return the first heading of the document, or None if it has none."""
+        if len(self.sections) > 1:
+            return self.sections[1][1]
+        return None
+
+    def add_block(self, block):
+        """
+        Index a Markdown block as it is converted.
+
+        Args:
+            block (str): A Markdown block as produced by split_blocks
+        """
+        position = 0
+        for match in HEADING_PATTERN.finditer(block):
+            self.add_text(block[position:match.start()])
+            heading_text = match.group(2)
+            anchor = unique_anchor(heading_anchor(heading_text), self.used_anchors)
+            self.sections.append((anchor, heading_text))
+            self.add_text(heading_text)
+            position = match.end()
+        self.add_text(block[position:])
+
+    def add_text(self, text):
+        """Count the terms of a piece of text in the current section."""
+        section = len(self.sections) - 1
+        for term in WORD_PATTERN.findall(text.lower()):
+            counts = self.terms.setdefault(term, {})
+            counts[section] = counts.get(section, 0) + 1
+
+    def to_json(self):
+        """
+        Serialize the index for the search box embedded in the preview page.
+
+        Terms are emitted as [term, sections] pairs rather than object keys, so
+        words such as "__proto__" or "constructor" cannot collide with the
+        properties of a JavaScript object.
+
+        Returns:
+            str: JSON safe to embed in a script element
+        """
+        data = {
+            'sections': self.sections,
+            'terms': [[term, sorted(counts)] for term, counts in self.terms.items()],
+        }
+        return json.dumps(data, separators=(',', ':')).replace('<', '\\u003c')
+
+
+class SearchIndex:
+    """
+    Persistent inverted index of converted documents, stored in SQLite.
+
+    Postings are clustered by term, so a query only reads the rows of its
+    own terms, and the database file is memory-mapped for fast lookups
+    across tens of thousands of documents.
+    """
+
+    def __init__(self, index_path):
+        """
+        Open or create the index.
+
+        Args:
+            index_path (str): The SQLite database file
+        """
+        self.index_path = index_path
+        self.connection = sqlite3.connect(index_path)
+        self.connection.execute(f'PRAGMA mmap_size = {SEARCH_INDEX_MMAP_SIZE}')
+        self.connection.executescript(SEARCH_INDEX_SCHEMA)
+
+    def add_document(self, path, document_index):
+        """
+        Add a document to the index, replacing any earlier version of it.
+
+        Args:
+            path (str): The path search results should link to
+            document_index (DocumentIndex): The terms collected for the document
+        """
+        title = document_index.title() or os.path.basename(path)
+        with self.connection:
+            self.delete_document(path)
+            cursor = self.connection.execute(
+                'INSERT INTO documents (path, title) VALUES (?, ?)', (path, title)
+            )
+            document_id = cursor.lastrowid
+            self.connection.executemany(
+                'INSERT INTO sections VALUES (?, ?, ?, ?)',
+                ((document_id, section, anchor, heading)
+                 for section, (anchor, heading) in enumerate(document_index.sections))
+            )
+            self.connection.executemany(
+                'INSERT INTO postings VALUES (?, ?, ?, ?)',
+                ((term, document_id, section, count)
+                 for term, counts in document_index.terms.items()
+                 for section, count in counts.items())
+            )
+
+    def remove_document(self, path):
+        """
+        Remove a document from the index.
+
+        Args:
+            path (str): The path the document was added under
+        """
+        with self.connection:
+            self.delete_document(path)
+
+    def delete_document(self, path):
+        """
+        Delete the rows of a document within the caller's transaction.
+
+        Args:
+            path (str): The path the document was added under
+        """
+        row = self.connection.execute(
+            'SELECT id FROM documents WHERE path = ?', (path,)
+        ).fetchone()
+        if row is not None:
+            self.connection.execute('DELETE FROM postings WHERE document_id = ?', row)
+            self.connection.execute('DELETE FROM sections WHERE document_id = ?', row)
+            self.connection.execute('DELETE FROM documents WHERE id = ?', row)
+
+    def search(self, query, limit=SEARCH_RESULT_LIMIT):
+        """
+        Find the documents containing every word of a query.
+
+        Documents are ranked by the number of occurrences of the query words,
+        and each result links to the section that matches the query best.
+
+        Args:
+            query (str): The words to search for
+            limit (int): The maximum number of results
+
+        Returns:
+            list: SearchResult tuples, best match first
+        """
+        terms = list(dict.fromkeys(WORD_PATTERN.findall(query.lower())))
+        if not terms:
+            return []
+            
+        placeholders = ', '.join('?' * len(terms))
+        rows = self.connection.execute(
+            f"""SELECT document_id, section, COUNT(*), SUM(count) FROM postings
+                WHERE term IN ({placeholders}) AND document_id IN (
+                    SELECT document_id FROM postings WHERE term IN ({placeholders})
+                    GROUP BY document_id HAVING COUNT(DISTINCT term) = ?)
+                GROUP BY document_id, section""",
+            terms + terms + [len(terms)]
+        )
+        
+        best_sections = {}
+        document_hits = {}
+        for document_id, section, matched, hits in rows:
+            document_hits[document_id] = document_hits.get(document_id, 0) + hits
+            best = best_sections.get(document_id)
+            if best is None or (matched, hits) > best[1:]:
+                best_sections[document_id] = (section, matched, hits)
+        
+        ranked = sorted(document_hits, key=document_hits.get, reverse=True)[:limit]
+        results = []
+        for document_id in ranked:
+            path, title = self.connection.execute(
+                'SELECT path, title FROM documents WHERE id = ?', (document_id,)
+            ).fetchone()
+            anchor, heading = self.connection.execute(
+                'SELECT anchor, heading FROM sections WHERE document_id = ? AND section = ?',
+                (document_id, best_sections[document_id][0])
+            ).fetchone()
+            results.append(SearchResult(path, title, anchor, heading, document_hits[document_id]))
+        return results
+
+    def close(self):
+        """Close the database connection."""
+        self.connection.close()
+
+
+class OutputSink:
+    """
+    Destination that rendered HTML is written to incrementally.
+
+    Sinks are used as context managers: leaving the block normally closes
+    the sink and commits its output, while an exception aborts it. A sink
+    whose commit fails is aborted as well.
+    """
+
+    def write(self, text):
+        """
+        Write a piece of the document.
+
+        Args:
+            text (str): The text to append
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Finish writing and commit the output."""
+
+    def abort(self):
+        """Discard the output after a failure."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            try:
+                self.close()
+            except BaseException:
+                self.abort()
+                raise
+        else:
+            self.abort()
+        return False
+
+
+class MemorySink(OutputSink):
+    """Sink that collects the document in an in-memory buffer."""
+
+    def __init__(self):
+        """Initialize an empty buffer."""
+        self.buffer = io.StringIO()
+
+    def write(self, text):
+        """Append text to the buffer."""
+        self.buffer.write(text)
+
+    def getvalue(self):
+        """Return everything written so far."""
+        return self.buffer.getvalue()
+
+
+class AtomicFileSink(OutputSink):
+    """
+    Sink that writes a file atomically.
+
+    Output goes to a temporary file next to the destination, which is flushed
+    to disk and renamed over the destination on close, so readers such as a
+    web server never see a partially written file.
+    """
+
+    def __init__(self, file_path, buffer_size=OUTPUT_BUFFER_SIZE, file_mode=NEW_FILE_MODE):
+        """
+        Open the temporary file.
+
+        Args:
+            file_path (str): The destination file
+            buffer_size (int): Size of the write buffer in bytes
+            file_mode (int): Permissions given to the destination if it does
+                not exist yet; an existing destination keeps its own
+        """
+        self.file_path = file_path
+        self.file_mode = file_mode
+        directory, filename = os.path.split(os.path.abspath(file_path))
+        # mkstemp creates the file exclusively under an unpredictable name, so
+        # it cannot be redirected through a symlink planted in a shared directory
+        file_descriptor, self.temp_path = tempfile.mkstemp(
+            prefix=f".{filename}.", suffix=".tmp", dir=directory
+        )
+        self.raw = os.fdopen(file_descriptor, 'wb', buffering=buffer_size)
+        self.stream = self.open_stream(self.raw)
+
+    def open_stream(self, raw):
+        """
+        Create the text stream that writes into the temporary file.
+
+        Args:
+            raw (BufferedWriter): The temporary file opened in binary mode
+
+        Returns:
+            TextIOWrapper: The stream written by write()
+        """
+        return io.TextIOWrapper(raw, encoding='utf-8')
+
+    def finish_stream(self):
+        """Flush the text stream into the temporary file without closing it."""
+        self.stream.flush()
+        self.stream.detach()
+
+    def write(self, text):
+        """Append text to the temporary file."""
+        self.stream.write(text)
+
+    def close(self):
+        """Flush the temporary file to disk and move it over the destination."""
+        self.finish_stream()
+        self.raw.flush()
+        os.fsync(self.raw.fileno())
+        self.raw.close()
+        if os.path.exists(self.file_path):
+            shutil.copymode(self.file_path, self.temp_path)
+        else:
+            os.chmod(self.temp_path, self.file_mode)
+        os.replace(self.temp_path, self.file_path)
+
+    def abort(self):
+        """Remove the temporary file, leaving the destination untouched."""
+        try:
+            self.stream.close()
+        except (OSError, ValueError):
+            pass
+        try:
+            self.raw.close()
+        finally:
+            if os.path.exists(self.temp_path):
+                os.remove(self.temp_path)
+
+
+class GzipFileSink(AtomicFileSink):
+    """
+    Sink that writes a gzip-compressed file atomically.
+
+    Used for pre-compressed side files such as page.html.gz that static web
+    servers can serve directly. Subclasses can override open_compressor to
+    produce other formats such as Brotli.
+    """
+
+    def __init__(self, file_path, buffer_size=OUTPUT_BUFFER_SIZE,
+                 compresslevel=GZIP_COMPRESS_LEVEL, file_mode=NEW_FILE_MODE):
+        """
+        Open the temporary file.
+
+        Args:
+            file_path (str): The destination file, usually ending in .gz
+            buffer_size (int): Size of the write buffer in bytes
+            compresslevel (int): The gzip compression level
+            file_mode (int): Permissions given to the destination if it does
+                not exist yet
+        """
+        self.compresslevel = compresslevel
+        super().__init__(file_path, buffer_size, file_mode)
+
+    def open_compressor(self, raw):
+        """
+        Create the compressor that writes into the temporary file.
+
+        Args:
+            raw (BufferedWriter): The temporary file opened in binary mode
+
+        Returns:
+            GzipFile: A binary stream that compresses into raw
+        """
+        filename = os.path.basename(self.file_path)
+        if filename.endswith('.gz'):
+            filename = filename[:-3]
+        return gzip.GzipFile(filename=filename, mode='wb', fileobj=raw,
+                             compresslevel=self.compresslevel, mtime=0)
+
+    def open_stream(self, raw):
+        """Create a text stream that compresses into the temporary file."""
+        self.compressor = self.open_compressor(raw)
+        return io.TextIOWrapper(self.compressor, encoding='utf-8')
+
+    def finish_stream(self):
+        """Flush the text stream and write the compressed trailer."""
+        super().finish_stream()
+        self.compressor.close()
+
+
+class TeeSink(OutputSink):
+    """Sink that copies everything written to several other sinks."""
+
+    def __init__(self, *sinks):
+        """
+        Initialize the sink.
+
+        Args:
+            *sinks (OutputSink): The sinks to write to
+        """
+        self.sinks = sinks
+
+    def write(self, text):
+        """Append text to every sink."""
+        for sink in self.sinks:
+            sink.write(text)
+
+    def close(self):
+        """Commit every sink, aborting the remaining ones if one fails."""
+        for index, sink in enumerate(self.sinks):
+            try:
+                sink.close()
+            except Exception:
+                for remaining in self.sinks[index:]:
+                    remaining.abort()
+                raise
+
+    def abort(self):
+        """Discard the output of every sink."""
+        for sink in self.sinks:
+            sink.abort()
+
+
+class EditorBuffer:
+    """
+    Python-side mirror of the content of a Tk text widget.
+
+    The widget's Tcl command is wrapped so that every insert, delete and
+    replace, whether from the keyboard or from code, is applied to a list of
+    lines as well. Reading the document then no longer copies the whole
+    buffer out of Tk, and saving can skip the write when nothing changed.
+    """
+
+    def __init__(self, text_widget):
+        """
+        Start mirroring a text widget.
+
+        Args:
+            text_widget (tk.Text): The widget to mirror; it must be empty
+        """
+        self.lines = ['']
+        self.modified = False
+        self.saved_state = None
+        self.tk = text_widget.tk
+        # Tk 8.6 stores characters outside the Basic Multilingual Plane as
+        # surrogate pairs, so an emoji takes two columns in its indexes
+        self.surrogate_columns = self.tk.call('string', 'length', '\U0001F600') == 2
+        self.widget_command = str(text_widget)
+        self.original_command = self.widget_command + '_original'
+        self.tk.call('rename', self.widget_command, self.original_command)
+        self.tk.createcommand(self.widget_command, self.dispatch)
+
+    def close(self):
+        """
+        Stop mirroring and restore the widget's own command.
+
+        Must be called before the widget is destroyed, otherwise the wrapper
+        command keeps this buffer alive in the Tcl interpreter.
+        """
+        if self.tk is None:
+            return
+        self.tk.deletecommand(self.widget_command)
+        self.tk.call('rename', self.original_command, self.widget_command)
+        self.tk = None
+
+    def dispatch(self, operation, *args):
+        """Run a widget command and apply any change it makes to the mirror."""
+        if operation == 'insert' and len(args) >= 2:
+            position = self.resolve(args[0])
+            result = self.tk.call((self.original_command, operation) + args)
+            self.insert(position, ''.join(args[1::2]))
+            return result
+            
+        if operation in ('delete', 'replace') and args:
+            start = self.resolve(args[0])
+            if len(args) > 1:
+                end = self.resolve(args[1])
+            else:
+                end = self.resolve(f'{args[0]} +1c')
+            result = self.tk.call((self.original_command, operation) + args)
+            if start < end:
+                self.delete(start, end)
+            if operation == 'replace':
+                self.insert(start, ''.join(args[2::2]))
+            return result
+            
+        return self.tk.call((self.original_command, operation) + args)
+
+    def resolve(self, index):
+        """
+        Convert a Tk text index into a position in the mirror.
+
+        Args:
+            index (str): Any Tk text index, such as "1.0" or "end"
+
+        Returns:
+            tuple: The zero-based line and column, clamped to the content
+        """
+        line, column = map(int, str(self.tk.call(self.original_command, 'index', index)).split('.'))
+        if line > len(self.lines):
+            return len(self.lines) - 1, len(self.lines[-1])
+        text = self.lines[line - 1]
+        if self.surrogate_columns and NON_BMP_PATTERN.search(text):
+            column = self.code_point_column(text, column)
+        return line - 1, min(column, len(text))
+
+    def code_point_column(self, text, column):
+        """
+        Convert a Tk column counted in UTF-16 code units into a string index.
+
+        Args:
+            text (str): The line the column belongs to
+            column (int): The Tk column
+
+        Returns:
+            int: The index of the character at that column in the line
+        """
+        units = 0
+        for position, char in enumerate(text):
+            if units >= column:
+                return position
+            units += 2 if char > '\uffff' else 1
+        return len(text)
+
+    def insert(self, position, text):
+        """
+        Insert text into the mirror.
+
+        Args:
+            position (tuple): The zero-based line and column
+            text (str): The text to insert
+        """
+        line, column = position
+        current = self.lines[line]
+        self.lines[line:line + 1] = (current[:column] + text + current[column:]).split('\n')
+        self.modified = True
+
+    def delete(self, start, end):
+        """
+        Delete a range of text from the mirror.
+
+        Args:
+            start (tuple): The zero-based line and column of the first character
+            end (tuple): The zero-based line and column after the last character
+        """
+        start_line, start_column = start
+        end_line, end_column = end
+        merged = self.lines[start_line][:start_column] + self.lines[end_line][end_column:]
+        self.lines[start_line:end_line + 1] = [merged]
+        self.modified = True
+
+    def content(self):
+        """
+        Get the document text, as text_widget.get(1.0, tk.END) would return it.
+
+        Returns:
+            str: The content of the widget including its trailing newline
+        """
+        return '\n'.join(self.lines) + '\n'
+
+    def is_blank(self):
+        """Return True if the document contains only whitespace."""
+        return not any(line.strip() for line in self.lines)
+
+    def save(self, file_path):
+        """
+        Write the document to a file unless the file already holds it.
+
+        The write is skipped when nothing was edited since this buffer last
+        saved to the same path and the file's size and modification time are
+        still the ones that save left behind.
+
+        Args:
+            file_path (str): The file to write
+        """
+        if not self.modified and os.path.exists(file_path):
+            file_stat = os.stat(file_path)
+            if (os.path.abspath(file_path), file_stat.st_size, file_stat.st_mtime_ns) == self.saved_state:
+                return
+                
+        with open(file_path, 'w', encoding='utf-8') as file:
+            file.write(self.content())
+            
+        file_stat = os.stat(file_path)
+        self.saved_state = (os.path.abspath(file_path), file_stat.st_size, file_stat.st_mtime_ns)
+        self.modified = False
+
+
+class DocumentTab:
+    """
+    State for a single open document.
+
+    Each tab owns its editor widget, the file it was loaded from, its preview
+    file, its render cache and the conversions still running for it. The
+    conversion worker pool and the render budget are shared by all tabs
+    through the MarkdownConverter.
+    """
+
+    def __init__(self, frame, text_editor, render_cache):
+        """
+        Initialize the tab state.
+
+        Args:
+            frame (tk.Frame): The notebook page holding the editor
+            text_editor (ScrolledText): The editor widget for this document
+            render_cache (RenderCache): The render cache for this document
+        """
+        self.frame = frame
+        self.text_editor = text_editor
+        self.buffer = EditorBuffer(text_editor)
+        self.render_cache = render_cache
+        self.current_file = None
+        self.temp_html_file = None
+        self.conversions = set()
+
+    def title(self):
+        """Return the label shown on the tab for this document."""
+        if self.current_file:
+            return os.path.basename(self.current_file)
+        return "Untitled"
+
+    def is_empty(self):
+        """Return True if the document is untitled and has no content."""
+        return not self.current_file and self.buffer.is_blank()
+
+
+class MarkdownRenderer:
+    """
+    Conversion and templating logic for turning Markdown into HTML.
+    
+    The renderer holds no GUI state, so it can be used on worker threads, in
+    worker processes and by convert_many. MarkdownConverter extends it with
+    the tkinter interface.
+    """
+    
+    def __init__(self, dark_theme=False, metrics=None, image_assets=None):
+        """
+        Initialize the renderer.
+        
+        Args:
+            dark_theme (bool): Use the dark theme for generated documents
+            metrics (Metrics): Registry for conversion timings, created if omitted
+            image_assets (ImageAssets): Resolver for local images, created
+                without a persistent cache or inlining if omitted
+        """
+        self.dark_theme = dark_theme
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.image_assets = image_assets if image_assets is not None else ImageAssets()
+        
+    def markdown_to_html(self, markdown_text, cache=None, base_dir=None):
+        """
+        Convert Markdown text to HTML using custom parsing rules.
+        
+        The text is split into independent blocks, so that a render cache can
+        skip blocks it has already seen and large documents can be converted
+        in parallel.
+        
+        Args:
+            markdown_text (str): The input Markdown text to convert
+            cache (RenderCache): Optional cache of previously rendered blocks
+            base_dir (str): Directory that relative image paths are resolved against
+            
+        Returns:
+            str: The converted HTML content
+        """
+        return ''.join(self.iter_html(markdown_text, cache, base_dir=base_dir))
+        
+    def iter_html(self, markdown_text, cache=None, document_index=None, base_dir=None):
+        """
+        Convert Markdown text to HTML one block at a time.
+        
+        Images are resolved after the render cache, so cached blocks pick up
+        changed image files and inlining settings.
+        
+        Args:
+            markdown_text (str): The input Markdown text to convert
+            cache (RenderCache): Optional cache of previously rendered blocks
+            document_index (DocumentIndex): Optional index to feed each block to
+            base_dir (str): Directory that relative image paths are resolved against
+            
+        Yields:
+            str: The HTML for each block, in document order
+        """
+        if not markdown_text:
+            return
+            
+        started = time.perf_counter()
+        elapsed = 0.0
+        
+        blocks = split_blocks(markdown_text)
+        if cache is None:
+            rendered = convert_blocks(blocks)
+        else:
+            rendered = cache.render_blocks(blocks)
+            
+        used_anchors = {}
+        for block, html_content in zip(blocks, rendered):
+            if document_index is not None:
+                document_index.add_block(block)
+            html_content = number_heading_ids(html_content, used_anchors)
+            if '<img ' in html_content:
+                html_content = self.image_assets.resolve(html_content, base_dir)
+            elapsed += time.perf_counter() - started
+            yield html_content
+            started = time.perf_counter()
+            
+        elapsed += time.perf_counter() - started
+        self.metrics.record('markdown_to_html', elapsed)
+        self.metrics.increment('documents_converted')
+        self.metrics.increment('markdown_characters', len(markdown_text))
+        
+    def generate_full_html(self, body_content):
+        """
+        Generate a complete HTML document with styling and metadata.
+        
+        Args:
+            body_content (str): The HTML body content
+            
+        Returns:
+            str: Complete HTML document
+        """
+        with self.metrics.timer('generate_full_html'):
+            html_head, html_tail = self.generate_html_frame()
+            return html_head + body_content + html_tail
+        
+    def generate_html_frame(self, search=False):
+        """
+        Generate the parts of the HTML document surrounding the body content.
+        
+        Args:
+            search (bool): Include a search box in the page header
+            
+        Returns:
+            tuple: The document text before and after the body content
+        """
+        theme_styles = self.get_theme_styles()
+        search_box = ""
+        if search:
+            theme_styles += self.get_search_styles()
+            search_box = """
+            <input type="search" id="search-box" placeholder="Search this document">
+            <ul id="search-results"></ul>"""
+        
+        html_head = f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Markdown Preview</title>
+    <style>
+        {theme_styles}
+    </style>
+</head>
+<body>
+    <div class="container">
+        <header>
+            <h1>Markdown Preview</h1>
+            <p class="timestamp">Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>{search_box}
+        </header>
+        <main class="content">
+            """
+        html_tail = """
+        </main>
+    </div>
+</body>
+</html>"""
+        return html_head, html_tail
+        
+    def generate_search_script(self, document_index):
+        """
+        Generate the script behind the search box of the preview page.
+        
+        Args:
+            document_index (DocumentIndex): The terms collected for the document
+            
+        Returns:
+            str: A script element with the embedded index
+        """
+        return f"""
+            <script>
+            (function () {{
+                var index = {document_index.to_json()};
+                var terms = new Map(index.terms);
+                var box = document.getElementById('search-box');
+                var results = document.getElementById('search-results');
+                box.addEventListener('input', function () {{
+                    var words = box.value.toLowerCase().match(/[\\p{{L}}\\p{{N}}_]+/gu) || [];
+                    var matches = null;
+                    results.innerHTML = '';
+                    words.forEach(function (word) {{
+                        var found = terms.get(word) || [];
+                        matches = matches === null ? found : matches.filter(function (section) {{
+                            return found.indexOf(section) !== -1;
+                        }});
+                    }});
+                    (matches || []).forEach(function (section) {{
+                        var item = document.createElement('li');
+                        var link = document.createElement('a');
+                        link.href = '#' + index.sections[section][0];
+                        link.textContent = index.sections[section][1];
+                        item.appendChild(link);
+                        results.appendChild(item);
+                    }});
+                }});
+            }})();
+            </script>"""
+        
+    def get_search_styles(self):
+        """
+        Get CSS styles for the search box of the preview page.
+        
+        Returns:
+            str: CSS styles shared by both themes
+        """
+        return """
+                #search-box {
+                    width: 100%;
+                    box-sizing: border-box;
+                    margin-top: 15px;
+                    padding: 8px 12px;
+                    font-size: 1em;
+                    border: 1px solid #6c757d;
+                    border-radius: 4px;
+                }
+                #search-results {
+                    margin: 10px 0 0 0;
+                }
+            """
+        
+    def get_theme_styles(self):
+        """
+        Get CSS styles based on the current theme setting.
+        
+        Returns:
+            str: CSS styles for the current theme
+        """
+        if self.dark_theme:
+            return """
+                body {
+                    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
+                    line-height: 1.6;
+                    color: #e9ecef;
+                    background-color: #212529;
+                    margin: 0;
+                    padding: 0;
+                }
+                .container {
+                    max-width: 800px;
+                    margin: 0 auto;
+                    padding: 20px;
+                }
+                header {
+                    border-bottom: 2px solid #495057;
+                    padding-bottom: 20px;
+                    margin-bottom: 30px;
+                }
+                header h1 {
+                    color: #fff;
+                    margin: 0;
+                    font-size: 2.5em;
+                }
+                .timestamp {
+                    color: #6c757d;
+                    font-size: 0.9em;
+                    margin: 10px 0 0 0;
+                }
+                .content h1, .content h2, .content h3, .content h4, .content h5, .content h6 {
+                    color: #fff;
+                    margin-top: 30px;
+                    margin-bottom: 15px;
+                }
+                .content h1 { font-size: 2.2em; }
+                .content h2 { font-size: 1.8em; }
+                .content h3 { font-size: 1.5em; }
+                code {
+                    background-color: #495057;
+                    color: #f8f9fa;
+                    padding: 2px 6px;
+                    border-radius: 4px;
+                    font-family: 'Consolas', 'Monaco', monospace;
+                }
+                pre {
+                    background-color: #343a40;
+                    color: #f8f9fa;
+                    padding: 15px;
+                    border-radius: 8px;
+                    overflow-x: auto;
+                    border-left: 4px solid #007bff;
+                }
+                blockquote {
+                    border-left: 4px solid #6c757d;
+                    padding-left: 20px;
+                    margin: 20px 0;
+                    color: #adb5bd;
+                    font-style: italic;
+                }
+                a {
+                    color: #007bff;
+                    text-decoration: none;
+                }
+                a:hover {
+                    text-decoration: underline;
+                }
+                ul, ol {
+                    padding-left: 25px;
+                }
+                li {
+                    margin-bottom: 8px;
+                }
+                p {
+                    margin-bottom: 16px;
+                }
+                img {
+                    max-width: 100%;
+                    height: auto;
+                }
+            """
+        else:
+            return """
+                body {
+                    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
+                    line-height: 1.6;
+                    color: #212529;
+                    background-color: #ffffff;
+                    margin: 0;
+                    padding: 0;
+                }
+                .container {
+                    max-width: 800px;
+                    margin: 0 auto;
+                    padding: 20px;
+                }
+                header {
+                    border-bottom: 2px solid #dee2e6;
+                    padding-bottom: 20px;
+                    margin-bottom: 30px;
+                }
+                header h1 {
+                    color: #343a40;
+                    margin: 0;
+                    font-size: 2.5em;
+                }
+                .timestamp {
+                    color: #6c757d;
+                    font-size: 0.9em;
+                    margin: 10px 0 0 0;
+                }
+                .content h1, .content h2, .content h3, .content h4, .content h5, .content h6 {
+                    color: #343a40;
+                    margin-top: 30px;
+                    margin-bottom: 15px;
+                }
+                .content h1 { font-size: 2.2em; }
+                .content h2 { font-size: 1.8em; }
+                .content h3 { font-size: 1.5em; }
+                code {
+                    background-color: #f8f9fa;
+                    color: #e83e8c;
+                    padding: 2px 6px;
+                    border-radius: 4px;
+                    font-family: 'Consolas', 'Monaco', monospace;
+                    border: 1px solid #dee2e6;
+                }
+                pre {
+                    background-color: #f8f9fa;
+                    color: #212529;
+                    padding: 15px;
+                    border-radius: 8px;
+                    overflow-x: auto;
+                    border-left: 4px solid #007bff;
+                    border: 1px solid #dee2e6;
+                }
+                blockquote {
+                    border-left: 4px solid #007bff;
+                    padding-left: 20px;
+                    margin: 20px 0;
+                    color: #6c757d;
+                    font-style: italic;
+                    background-color: #f8f9fa;
+                    padding: 15px 20px;
+                    border-radius: 4px;
+                }
+                a {
+                    color: #007bff;
+                    text-decoration: none;
+                }
+                a:hover {
+                    text-decoration: underline;
+                }
+                ul, ol {
+                    padding-left: 25px;
+                }
+                li {
+                    margin-bottom: 8px;
+                }
+                p {
+                    margin-bottom: 16px;
+                }
+                img {
+                    max-width: 100%;
+                    height: auto;
+                }
+            """
+    
+    def write_document(self, sink, markdown_content, cache=None, document_index=None,
+                       base_dir=None):
+        """
+        Render a complete HTML document into a sink block by block.
+        
+        When a document index is given, it is filled during the conversion and
+        embedded in the page behind a search box.
+        
+        Args:
+            sink (OutputSink): The destination for the HTML document
+            markdown_content (str): The Markdown content to convert
+            cache (RenderCache): Optional cache of previously rendered blocks
+            document_index (DocumentIndex): Optional index to fill
+            base_dir (str): Directory that relative image paths are resolved against
+        """
+        with self.metrics.timer('generate_full_html'):
+            html_head, html_tail = self.generate_html_frame(search=document_index is not None)
+        sink.write(html_head)
+        for html_content in self.iter_html(markdown_content, cache, document_index, base_dir):
+            sink.write(html_content)
+        if document_index is not None:
+            sink.write(self.generate_search_script(document_index))
+        sink.write(html_tail)
+    
+    def render_document(self, markdown_content, cache=None, base_dir=None):
+        """
+        Convert Markdown content into a complete HTML document.
+        
+        Args:
+            markdown_content (str): The Markdown content to convert
+            cache (RenderCache): Optional cache of previously rendered blocks
+            base_dir (str): Directory that relative image paths are resolved against
+            
+        Returns:
+            str: Complete HTML document
+        """
+        sink = MemorySink()
+        self.write_document(sink, markdown_content, cache, base_dir=base_dir)
+        return sink.getvalue()
+    
+    def render_to_sink(self, open_sink, markdown_content, cache=None, document_index=None,
+                       base_dir=None):
+        """
+        Open a sink and render a document into it, aborting the sink on failure.
+        
+        Args:
+            open_sink (callable): Creates the OutputSink to write to
+            markdown_content (str): The Markdown content to convert
+            cache (RenderCache): Optional cache of previously rendered blocks
+            document_index (DocumentIndex): Optional index to fill
+            base_dir (str): Directory that relative image paths are resolved against
+            
+        Returns:
+            OutputSink: The closed sink
+        """
+        sink = open_sink()
+        try:
+            self.write_document(sink, markdown_content, cache, document_index, base_dir)
+            with self.metrics.timer('output_commit'):
+                sink.close()
+        except BaseException:
+            sink.abort()
+            raise
+        return sink
+    
+    def convert_sources(self, sources, full_document=False, cache=None):
+        """
+        Convert a batch of Markdown sources, sharing one template and cache.
+        
+        The cache pays off when sources repeat blocks, such as shared
+        boilerplate; for unique sources it only adds cost, so it is bypassed
+        once RenderCache.is_effective reports too few hits.
+        
+        Relative image paths are resolved against the directory of path
+        sources and against the current directory otherwise.
+        
+        Args:
+            sources (iterable): Markdown text, UTF-8 bytes or paths, see read_source
+            full_document (bool): Wrap each result in the complete HTML template
+            cache (RenderCache): Cache shared by the whole batch; a new one is
+                created if omitted, and False converts without a cache
+            
+        Returns:
+            list: The converted HTML for each source, in the same order
+        """
+        if cache is None:
+            cache = RenderCache()
+        if full_document:
+            html_head, html_tail = self.generate_html_frame()
+            
+        results = []
+        for source in sources:
+            markdown_text = read_source(source)
+            if cache and not cache.is_effective():
+                cache = False
+            if not markdown_text:
+                html_body = ""
+            elif cache:
+                html_body = ''.join(cache.render_blocks(split_blocks(markdown_text)))
+            else:
+                html_body = ''.join([convert_block(block) for block in split_blocks(markdown_text)])
+            html_body = number_heading_ids(html_body, {})
+            if '<img ' in html_body:
+                base_dir = os.path.dirname(os.path.abspath(source)) if isinstance(source, os.PathLike) else None
+                html_body = self.image_assets.resolve(html_body, base_dir)
+            if full_document:
+                html_body = html_head + html_body + html_tail
+            results.append(html_body)
+        if cache:
+            cache.trim(RENDER_CACHE_BUDGET)
+        return results
+
+
+def read_source(source):
+    """
+    Load the Markdown text of a conversion source.
+    
+    Args:
+        source: Markdown text as str, UTF-8 encoded Markdown as bytes, or the
+            path of a Markdown file as an os.PathLike such as pathlib.Path
+            
+    Returns:
+        str: The Markdown text
+    """
+    if isinstance(source, (bytes, bytearray)):
+        return source.decode('utf-8')
+    if isinstance(source, os.PathLike):
+        with open(source, 'r', encoding='utf-8') as file:
+            return file.read()
+    return source
+
+
+def convert_batch(sources, full_document=False, dark_theme=False):
+    """
+    Convert a batch of Markdown sources. Runs in a convert_many worker.
+    
+    Args:
+        sources (list): Markdown text, UTF-8 bytes or paths, see read_source
+        full_document (bool): Wrap each result in the complete HTML template
+        dark_theme (bool): Use the dark theme for full documents
+        
+    Returns:
+        list: The converted HTML for each source, in the same order
+    """
+    return MarkdownRenderer(dark_theme).convert_sources(sources, full_document)
+
+
+def convert_many(sources, full_document=False, dark_theme=False, executor=None,
+                 batch_size=CONVERT_BATCH_SIZE):
+    """
+    Convert many Markdown documents, yielding each result as it is ready.
+    
+    Sources are grouped into batches that share compiled rules, the HTML
+    template and a render cache, which keeps the per-document overhead low for
+    large numbers of short snippets. Results are yielded in input order.
+    
+    Args:
+        sources (iterable): Markdown text, UTF-8 bytes or paths, see read_source
+        full_document (bool): Wrap each result in the complete HTML template
+        dark_theme (bool): Use the dark theme for full documents
+        executor (Executor): Optional thread or process pool to convert the
+            batches on; without one, batches are converted in this thread
+        batch_size (int): Number of sources per batch
+        
+    Yields:
+        str: The converted HTML for each source, in the same order
+    """
+    sources = iter(sources)
+    batches = iter(lambda: list(itertools.islice(sources, batch_size)), [])
+    
+    if executor is None:
+        renderer = MarkdownRenderer(dark_theme)
+        cache = RenderCache()
+        for batch in batches:
+            yield from renderer.convert_sources(batch, full_document, cache)
+        return
+        
+    pending = deque()
+    for batch in batches:
+        pending.append(executor.submit(convert_batch, batch, full_document, dark_theme))
+        if len(pending) >= CONVERT_PENDING_BATCHES:
+            yield from pending.popleft().result()
+    while pending:
+        yield from pending.popleft().result()
+
+
+class MarkdownConverter(MarkdownRenderer):
     """
     Main application class for the Markdown to HTML Converter.
     
-    This class handles the GUI interface, file operations, and conversion logic
-    for transforming Markdown content into HTML with live preview functionality.
+    This class handles the GUI interface and file operations, and inherits the
+    conversion logic for transforming Markdown content into HTML from
+    MarkdownRenderer.
     """
     
     def __init__(self):
         """Initialize the application with GUI components and default settings."""
+        super().__init__(image_assets=ImageAssets(IMAGE_CACHE_FILE))
         self.root = tk.Tk()
         self.root.title("Markdown to HTML Converter with Live Preview")
         self.root.geometry("800x600")
         self.root.minsize(600, 400)
         
-        self.current_file = None
-        self.dark_theme = False
         self.auto_save_enabled = False
-        self.temp_html_file = None
+        
+        self.tabs = []
+        self.closed_tabs = set()
+        self.search_index = None
+        self.render_budget = RenderBudget()
+        self.worker_pool = ThreadPoolExecutor(max_workers=RENDER_WORKERS,
+                                              thread_name_prefix="render")
+        self.metrics_server = None
+        self.register_metrics()
         
         self.setup_gui()
         self.setup_menu()
+        self.new_tab()
         
     def setup_gui(self):
         """Set up the main GUI components including text editor and buttons."""
@@ -101,19 +2272,9 @@ class MarkdownConverter:
         editor_label = tk.Label(main_frame, text="Markdown Editor:", font=("Arial", 12))
         editor_label.pack(anchor=tk.W, pady=(10, 5))
         
-        self.text_editor = scrolledtext.ScrolledText(
-            main_frame,
-            wrap=tk.WORD,
-            font=("Consolas", 11),
-            bg="#f8f9fa",
-            fg="#212529",
-            insertbackground="#007bff",
-            selectbackground="#007bff",
-            selectforeground="white"
-        )
-        self.text_editor.pack(fill=tk.BOTH, expand=True)
-        
-        self.text_editor.bind('<KeyRelease>', self.on_text_change)
+        self.notebook = ttk.Notebook(main_frame)
+        self.notebook.pack(fill=tk.BOTH, expand=True)
+        self.notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
         
         status_frame = tk.Frame(main_frame)
         status_frame.pack(fill=tk.X, pady=(10, 0))
@@ -147,15 +2308,35 @@ class MarkdownConverter:
         file_menu.add_command(label="Open", command=self.open_file, accelerator="Ctrl+O")
         file_menu.add_command(label="Save", command=self.save_file, accelerator="Ctrl+S")
         file_menu.add_command(label="Save As", command=self.save_as_file, accelerator="Ctrl+Shift+S")
+        file_menu.add_command(label="Close Tab", command=self.close_tab, accelerator="Ctrl+W")
         file_menu.add_separator()
         file_menu.add_command(label="Export HTML", command=self.export_html, accelerator="Ctrl+E")
+        self.compress_export_var = tk.BooleanVar()
+        file_menu.add_checkbutton(label="Write .gz Copy on Export", variable=self.compress_export_var)
+        self.inline_images_var = tk.BooleanVar()
+        file_menu.add_checkbutton(label="Inline Small Images", variable=self.inline_images_var,
+                                  command=self.toggle_inline_images)
         file_menu.add_separator()
-        file_menu.add_command(label="Exit", command=self.root.quit, accelerator="Ctrl+Q")
+        file_menu.add_command(label="Exit", command=self.on_closing, accelerator="Ctrl+Q")
         
         view_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="View", menu=view_menu)
         view_menu.add_command(label="Live Preview", command=self.live_preview, accelerator="F5")
         view_menu.add_command(label="Toggle Theme", command=self.toggle_theme, accelerator="Ctrl+T")
+        view_menu.add_separator()
+        view_menu.add_command(label="Diagnostics", command=self.show_diagnostics_window)
+        self.metrics_server_var = tk.BooleanVar()
+        view_menu.add_checkbutton(label=f"Serve Metrics on Port {METRICS_PORT}",
+                                  variable=self.metrics_server_var,
+                                  command=self.toggle_metrics_server)
+        
+        search_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Search", menu=search_menu)
+        self.build_index_var = tk.BooleanVar()
+        search_menu.add_checkbutton(label="Build Search Index", variable=self.build_index_var)
+        search_menu.add_command(label="Open Search Index...", command=self.open_search_index)
+        search_menu.add_command(label="Search Documents...", command=self.show_search_window,
+                                accelerator="Ctrl+Shift+F")
         
         help_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Help", menu=help_menu)
@@ -166,274 +2347,105 @@ class MarkdownConverter:
         self.root.bind('<Control-o>', lambda e: self.open_file())
         self.root.bind('<Control-s>', lambda e: self.save_file())
         self.root.bind('<Control-Shift-S>', lambda e: self.save_as_file())
+        self.root.bind('<Control-w>', lambda e: self.close_tab())
         self.root.bind('<Control-e>', lambda e: self.export_html())
-        self.root.bind('<Control-q>', lambda e: self.root.quit())
+        self.root.bind('<Control-q>', lambda e: self.on_closing())
         self.root.bind('<F5>', lambda e: self.live_preview())
         self.root.bind('<Control-t>', lambda e: self.toggle_theme())
+        self.root.bind('<Control-Shift-F>', lambda e: self.show_search_window())
         
-    def markdown_to_html(self, markdown_text):
+    def new_tab(self):
         """
-        Convert Markdown text to HTML using custom parsing rules.
+        Create a new document tab with an empty editor and make it active.
         
-        Args:
-            markdown_text (str): The input Markdown text to convert
-            
         Returns:
-            str: The converted HTML content
+            DocumentTab: The newly created tab
         """
-        if not markdown_text:
-            return ""
-            
-        html_content = html.escape(markdown_text)
-        
-        html_content = re.sub(r'^# (.*?)$', r'<h1>\1</h1>', html_content, flags=re.MULTILINE)
-        html_content = re.sub(r'^## (.*?)$', r'<h2>\1</h2>', html_content, flags=re.MULTILINE)
-        html_content = re.sub(r'^### (.*?)$', r'<h3>\1</h3>', html_content, flags=re.MULTILINE)
-        html_content = re.sub(r'^#### (.*?)$', r'<h4>\1</h4>', html_content, flags=re.MULTILINE)
-        html_content = re.sub(r'^##### (.*?)$', r'<h5>\1</h5>', html_content, flags=re.MULTILINE)
-        html_content = re.sub(r'^###### (.*?)$', r'<h6>\1</h6>', html_content, flags=re.MULTILINE)
-        
-        html_content = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', html_content)
-        html_content = re.sub(r'__(.*?)__', r'<strong>\1</strong>', html_content)
-        
-        html_content = re.sub(r'\*(.*?)\*', r'<em>\1</em>', html_content)
-        html_content = re.sub(r'_(.*?)_', r'<em>\1</em>', html_content)
-        
-        html_content = re.sub(r'`([^`]+)`', r'<code>\1</code>', html_content)
-        
-        html_content = re.sub(r'^```(\w*)\n(.*?)\n```$', 
-                             lambda m: f'<pre><code class="language-{m.group(1)}">{m.group(2)}</code></pre>',
-                             html_content, flags=re.MULTILINE | re.DOTALL)
-        
-        html_content = re.sub(r'^> (.*?)$', r'<blockquote>\1</blockquote>', 
-                             html_content, flags=re.MULTILINE)
-        
-        html_content = re.sub(r'\[([^\]]+)\]\(([^)]+)\)', r'<a href="\2">\1</a>', html_content)
-        
-        html_content = re.sub(r'^(\d+)\. (.*?)$', r'<ol><li>\2</li></ol>', 
-                             html_content, flags=re.MULTILINE)
-        
-        html_content = re.sub(r'^[-*+] (.*?)$', r'<ul><li>\1</li></ul>', 
-                             html_content, flags=re.MULTILINE)
-        
-        html_content = re.sub(r'</ol>\s*<ol>', '', html_content)
-        html_content = re.sub(r'</ul>\s*<ul>', '', html_content)
-        
-        html_content = re.sub(r'\n\n', '</p><p>', html_content)
-        html_content = f'<p>{html_content}</p>'
-        
-        html_content = re.sub(r'<p></p>', '', html_content)
-        html_content = re.sub(r'<p>(<h[1-6]>.*?</h[1-6]>)</p>', r'\1', html_content)
-        html_content = re.sub(r'<p>(<(?:ul|ol|blockquote|pre)>.*?</(?:ul|ol|blockquote|pre)>)</p>', 
-                             r'\1', html_content, flags=re.DOTALL)
+        frame = tk.Frame(self.notebook)
+        text_editor = scrolledtext.ScrolledText(
+            frame,
+            wrap=tk.WORD,
+            font=("Consolas", 11),
+            bg="#f8f9fa",
+            fg="#212529",
+            insertbackground="#007bff",
+            selectbackground="#007bff",
+            selectforeground="white"
+        )
+        text_editor.pack(fill=tk.BOTH, expand=True)
+        text_editor.bind('<KeyRelease>', self.on_text_change)
         
-        return html_content
+        tab = DocumentTab(frame, text_editor, RenderCache())
+        self.tabs.append(tab)
+        self.render_budget.register(tab.render_cache)
         
-    def generate_full_html(self, body_content):
+        self.notebook.add(frame, text=tab.title())
+        self.notebook.select(frame)
+        text_editor.focus_set()
+        return tab
+    
+    def current_tab(self):
         """
-        Generate a complete HTML document with styling and metadata.
+        Get the document tab currently shown in the notebook.
         
-        Args:
-            body_content (str): The HTML body content
-            
         Returns:
-            str: Complete HTML document
+            DocumentTab: The active tab, or None if no tab is selected
         """
-        theme_styles = self.get_theme_styles()
+        selected = self.notebook.select()
+        for tab in self.tabs:
+            if str(tab.frame) == selected:
+                return tab
+        return None
+    
+    def close_tab(self):
+        """Close the active document tab, keeping at least one tab open."""
+        tab = self.current_tab()
+        if tab is None:
+            return
+            
+        if not tab.buffer.is_blank():
+            if not messagebox.askyesno("Close Tab", "Current content will be lost. Continue?"):
+                return
         
-        html_template = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Markdown Preview</title>
-    <style>
-        {theme_styles}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <header>
-            <h1>Markdown Preview</h1>
-            <p class="timestamp">Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
-        </header>
-        <main class="content">
-            {body_content}
-        </main>
-    </div>
-</body>
-</html>"""
-        return html_template
+        # A running conversion may still write the preview file, so it is
+        # removed by poll_conversion once the last one has finished
+        if tab.conversions:
+            self.closed_tabs.add(tab)
+        else:
+            self.remove_preview_file(tab)
+        self.render_budget.unregister(tab.render_cache)
+        self.tabs.remove(tab)
+        self.notebook.forget(tab.frame)
+        tab.buffer.close()
+        tab.frame.destroy()
         
-    def get_theme_styles(self):
+        if not self.tabs:
+            self.new_tab()
+        self.update_status(f"Closed: {tab.title()}")
+    
+    def on_tab_changed(self, event=None):
+        """Handle switching tabs by refreshing the title and cache priority."""
+        tab = self.current_tab()
+        if tab is not None:
+            self.render_budget.touch(tab.render_cache)
+            self.update_title(tab)
+    
+    def update_title(self, tab):
         """
-        Get CSS styles based on the current theme setting.
+        Update the window title and tab label for a document.
         
-        Returns:
-            str: CSS styles for the current theme
+        Args:
+            tab (DocumentTab): The document whose title changed
         """
-        if self.dark_theme:
-            return """
-                body {
-                    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-                    line-height: 1.6;
-                    color: #e9ecef;
-                    background-color: #212529;
-                    margin: 0;
-                    padding: 0;
-                }
-                .container {
-                    max-width: 800px;
-                    margin: 0 auto;
-                    padding: 20px;
-                }
-                header {
-                    border-bottom: 2px solid #495057;
-                    padding-bottom: 20px;
-                    margin-bottom: 30px;
-                }
-                header h1 {
-                    color: #fff;
-                    margin: 0;
-                    font-size: 2.5em;
-                }
-                .timestamp {
-                    color: #6c757d;
-                    font-size: 0.9em;
-                    margin: 10px 0 0 0;
-                }
-                .content h1, .content h2, .content h3, .content h4, .content h5, .content h6 {
-                    color: #fff;
-                    margin-top: 30px;
-                    margin-bottom: 15px;
-                }
-                .content h1 { font-size: 2.2em; }
-                .content h2 { font-size: 1.8em; }
-                .content h3 { font-size: 1.5em; }
-                code {
-                    background-color: #495057;
-                    color: #f8f9fa;
-                    padding: 2px 6px;
-                    border-radius: 4px;
-                    font-family: 'Consolas', 'Monaco', monospace;
-                }
-                pre {
-                    background-color: #343a40;
-                    color: #f8f9fa;
-                    padding: 15px;
-                    border-radius: 8px;
-                    overflow-x: auto;
-                    border-left: 4px solid #007bff;
-                }
-                blockquote {
-                    border-left: 4px solid #6c757d;
-                    padding-left: 20px;
-                    margin: 20px 0;
-                    color: #adb5bd;
-                    font-style: italic;
-                }
-                a {
-                    color: #007bff;
-                    text-decoration: none;
-                }
-                a:hover {
-                    text-decoration: underline;
-                }
-                ul, ol {
-                    padding-left: 25px;
-                }
-                li {
-                    margin-bottom: 8px;
-                }
-                p {
-                    margin-bottom: 16px;
-                }
-            """
-        else:
-            return """
-                body {
-                    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-                    line-height: 1.6;
-                    color: #212529;
-                    background-color: #ffffff;
-                    margin: 0;
-                    padding: 0;
-                }
-                .container {
-                    max-width: 800px;
-                    margin: 0 auto;
-                    padding: 20px;
-                }
-                header {
-                    border-bottom: 2px solid #dee2e6;
-                    padding-bottom: 20px;
-                    margin-bottom: 30px;
-                }
-                header h1 {
-                    color: #343a40;
-                    margin: 0;
-                    font-size: 2.5em;
-                }
-                .timestamp {
-                    color: #6c757d;
-                    font-size: 0.9em;
-                    margin: 10px 0 0 0;
-                }
-                .content h1, .content h2, .content h3, .content h4, .content h5, .content h6 {
-                    color: #343a40;
-                    margin-top: 30px;
-                    margin-bottom: 15px;
-                }
-                .content h1 { font-size: 2.2em; }
-                .content h2 { font-size: 1.8em; }
-                .content h3 { font-size: 1.5em; }
-                code {
-                    background-color: #f8f9fa;
-                    color: #e83e8c;
-                    padding: 2px 6px;
-                    border-radius: 4px;
-                    font-family: 'Consolas', 'Monaco', monospace;
-                    border: 1px solid #dee2e6;
-                }
-                pre {
-                    background-color: #f8f9fa;
-                    color: #212529;
-                    padding: 15px;
-                    border-radius: 8px;
-                    overflow-x: auto;
-                    border-left: 4px solid #007bff;
-                    border: 1px solid #dee2e6;
-                }
-                blockquote {
-                    border-left: 4px solid #007bff;
-                    padding-left: 20px;
-                    margin: 20px 0;
-                    color: #6c757d;
-                    font-style: italic;
-                    background-color: #f8f9fa;
-                    padding: 15px 20px;
-                    border-radius: 4px;
-                }
-                a {
-                    color: #007bff;
-                    text-decoration: none;
-                }
-                a:hover {
-                    text-decoration: underline;
-                }
-                ul, ol {
-                    padding-left: 25px;
-                }
-                li {
-                    margin-bottom: 8px;
-                }
-                p {
-                    margin-bottom: 16px;
-                }
-            """
+        self.notebook.tab(tab.frame, text=tab.title())
+        if tab is self.current_tab():
+            if tab.current_file:
+                self.root.title(f"Markdown Converter - {tab.title()}")
+            else:
+                self.root.title("Markdown Converter - New Document")
     
     def open_file(self):
-        """Open and load a Markdown file into the editor."""
+        """Open a Markdown file in a tab, reusing the active tab if it is empty."""
         file_path = filedialog.askopenfilename(
             title="Open Markdown File",
             filetypes=[
@@ -444,17 +2456,26 @@ class MarkdownConverter:
         )
         
         if file_path:
+            for tab in self.tabs:
+                if tab.current_file and os.path.abspath(tab.current_file) == os.path.abspath(file_path):
+                    self.notebook.select(tab.frame)
+                    self.update_status(f"Already open: {tab.title()}")
+                    return
+            
             try:
-                with open(file_path, 'r', encoding='utf-8') as file:
+                with self.metrics.timer('file_read'), open(file_path, 'r', encoding='utf-8') as file:
                     content = file.read()
+                
+                tab = self.current_tab()
+                if tab is None or not tab.is_empty():
+                    tab = self.new_tab()
                     
-                self.text_editor.delete(1.0, tk.END)
-                self.text_editor.insert(1.0, content)
+                tab.text_editor.delete(1.0, tk.END)
+                tab.text_editor.insert(1.0, content)
                 
-                self.current_file = file_path
-                filename = os.path.basename(file_path)
-                self.root.title(f"Markdown Converter - {filename}")
-                self.update_status(f"Opened: {filename}")
+                tab.current_file = file_path
+                self.update_title(tab)
+                self.update_status(f"Opened: {tab.title()}")
                 
             except FileNotFoundError:
                 messagebox.showerror("Error", "File not found.")
@@ -464,34 +2485,31 @@ class MarkdownConverter:
                 messagebox.showerror("Error", f"An error occurred while opening the file: {str(e)}")
     
     def new_file(self):
-        """Create a new empty document."""
-        if self.text_editor.get(1.0, tk.END).strip():
-            if messagebox.askyesno("New File", "Current content will be lost. Continue?"):
-                self.text_editor.delete(1.0, tk.END)
-                self.current_file = None
-                self.root.title("Markdown Converter - New Document")
-                self.update_status("New document created")
-        else:
-            self.text_editor.delete(1.0, tk.END)
-            self.current_file = None
-            self.root.title("Markdown Converter - New Document")
-            self.update_status("New document created")
+        """Create a new empty document in its own tab."""
+        self.new_tab()
+        self.update_status("New document created")
     
-    def save_file(self):
-        """Save the current document."""
-        if self.current_file:
+    def save_file(self, tab=None):
+        """
+        Save a document, defaulting to the active tab.
+        
+        Args:
+            tab (DocumentTab): The document to save
+        """
+        tab = tab or self.current_tab()
+        if tab.current_file:
             try:
-                content = self.text_editor.get(1.0, tk.END)
-                with open(self.current_file, 'w', encoding='utf-8') as file:
-                    file.write(content)
-                self.update_status(f"Saved: {os.path.basename(self.current_file)}")
+                with self.metrics.timer('file_save'):
+                    tab.buffer.save(tab.current_file)
+                self.update_status(f"Saved: {tab.title()}")
             except Exception as e:
                 messagebox.showerror("Error", f"Unable to save file: {str(e)}")
         else:
             self.save_as_file()
     
     def save_as_file(self):
-        """Save the current document with a new filename."""
+        """Save the active document with a new filename."""
+        tab = self.current_tab()
         file_path = filedialog.asksaveasfilename(
             title="Save Markdown File",
             defaultextension=".md",
@@ -504,49 +2522,112 @@ class MarkdownConverter:
         
         if file_path:
             try:
-                content = self.text_editor.get(1.0, tk.END)
-                with open(file_path, 'w', encoding='utf-8') as file:
-                    file.write(content)
+                with self.metrics.timer('file_save'):
+                    tab.buffer.save(file_path)
                 
-                self.current_file = file_path
-                filename = os.path.basename(file_path)
-                self.root.title(f"Markdown Converter - {filename}")
-                self.update_status(f"Saved as: {filename}")
+                tab.current_file = file_path
+                self.update_title(tab)
+                self.update_status(f"Saved as: {tab.title()}")
                 
             except Exception as e:
                 messagebox.showerror("Error", f"Unable to save file: {str(e)}")
     
+    def register_metrics(self):
+        """Expose the render caches of all open tabs as gauges."""
+        def cache_total(attribute):
+            return lambda: sum(getattr(tab.render_cache, attribute) for tab in list(self.tabs))
+            
+        self.metrics.register_gauge('render_cache_hits', cache_total('hits'))
+        self.metrics.register_gauge('render_cache_misses', cache_total('misses'))
+        self.metrics.register_gauge('render_cache_bytes', cache_total('size'))
+        self.metrics.register_gauge('render_cache_entries',
+                                    lambda: sum(len(tab.render_cache.entries) for tab in list(self.tabs)))
+        self.metrics.register_gauge('open_tabs', lambda: len(self.tabs))
+    
+    def submit_conversion(self, tab, markdown_content, open_sink, callback,
+                          document_index=None):
+        """
+        Convert a document on the shared worker pool without blocking the GUI.
+        
+        Args:
+            tab (DocumentTab): The document being converted
+            markdown_content (str): The Markdown content to convert
+            open_sink (callable): Creates the OutputSink to write to; called
+                on the worker thread so that opening errors are reported too
+            callback (callable): Called on the GUI thread with the tab and the
+                finished future, unless the tab was closed in the meantime
+            document_index (DocumentIndex): Optional index to fill
+        """
+        base_dir = os.path.dirname(os.path.abspath(tab.current_file)) if tab.current_file else None
+        self.metrics.adjust_gauge('conversion_queue_depth', 1)
+        future = self.worker_pool.submit(self.render_to_sink, open_sink,
+                                         markdown_content, tab.render_cache,
+                                         document_index, base_dir)
+        future.add_done_callback(
+            lambda future: self.metrics.adjust_gauge('conversion_queue_depth', -1))
+        tab.conversions.add(future)
+        self.root.after(RENDER_POLL_INTERVAL, self.poll_conversion, tab, future, callback)
+    
+    def poll_conversion(self, tab, future, callback):
+        """Wait for a submitted conversion and hand its result to the callback."""
+        if not future.done():
+            self.root.after(RENDER_POLL_INTERVAL, self.poll_conversion, tab, future, callback)
+            return
+            
+        tab.conversions.discard(future)
+        active_tab = self.current_tab()
+        self.render_budget.enforce(active_tab.render_cache if active_tab else None)
+        
+        if tab in self.tabs:
+            callback(tab, future)
+        elif not tab.conversions:
+            self.closed_tabs.discard(tab)
+            self.remove_preview_file(tab)
+    
     def live_preview(self):
-        """Generate and display live preview of the Markdown content."""
-        markdown_content = self.text_editor.get(1.0, tk.END)
+        """Generate and display live preview of the active document."""
+        tab = self.current_tab()
+        markdown_content = tab.buffer.content()
         
         if not markdown_content.strip():
             messagebox.showwarning("Warning", "No content to preview.")
             return
             
+        if not tab.temp_html_file:
+            file_descriptor, tab.temp_html_file = tempfile.mkstemp(suffix='.html')
+            os.close(file_descriptor)
+        
+        preview_file = tab.temp_html_file
+        self.update_status("Generating preview...")
+        self.submit_conversion(tab, markdown_content,
+                               lambda: AtomicFileSink(preview_file),
+                               self.show_preview,
+                               self.new_document_index())
+    
+    def show_preview(self, tab, future):
+        """
+        Open a finished preview in the browser.
+        
+        The preview file of a tab is replaced atomically on every preview, so
+        reloading the browser page always shows a complete document.
+        
+        Args:
+            tab (DocumentTab): The document that was converted
+            future (Future): The finished conversion
+        """
         try:
-            html_body = self.markdown_to_html(markdown_content)
-            full_html = self.generate_full_html(html_body)
-            
-            if self.temp_html_file and os.path.exists(self.temp_html_file):
-                os.remove(self.temp_html_file)
-            
-            temp_file = tempfile.NamedTemporaryFile(mode='w', suffix='.html', 
-                                                  delete=False, encoding='utf-8')
-            temp_file.write(full_html)
-            temp_file.close()
-            
-            self.temp_html_file = temp_file.name
+            future.result()
             
-            webbrowser.open(f'file://{os.path.abspath(self.temp_html_file)}')
+            webbrowser.open(f'file://{os.path.abspath(tab.temp_html_file)}')
             self.update_status("Live preview opened in browser")
             
         except Exception as e:
             messagebox.showerror("Error", f"Unable to generate preview: {str(e)}")
     
     def export_html(self):
-        """Export the converted HTML to a file."""
-        markdown_content = self.text_editor.get(1.0, tk.END)
+        """Export the active document's converted HTML to a file."""
+        tab = self.current_tab()
+        markdown_content = tab.buffer.content()
         
         if not markdown_content.strip():
             messagebox.showwarning("Warning", "No content to export.")
@@ -562,19 +2643,201 @@ class MarkdownConverter:
         )
         
         if file_path:
+            compress = self.compress_export_var.get()
+            document_index = self.new_document_index()
+            self.update_status("Exporting...")
+            self.submit_conversion(
+                tab, markdown_content,
+                lambda: self.open_export_sink(file_path, compress),
+                lambda tab, future: self.finish_export(file_path, future, document_index),
+                document_index
+            )
+    
+    def open_export_sink(self, file_path, compress=False):
+        """
+        Create the sink for an HTML export.
+        
+        Args:
+            file_path (str): The destination HTML file
+            compress (bool): Also write a gzip-compressed copy next to it
+            
+        Returns:
+            OutputSink: The sink to render the export into
+        """
+        if not compress:
+            return AtomicFileSink(file_path)
+            
+        html_sink = AtomicFileSink(file_path)
+        try:
+            gzip_sink = GzipFileSink(file_path + '.gz')
+        except Exception:
+            html_sink.abort()
+            raise
+        return TeeSink(html_sink, gzip_sink)
+    
+    def finish_export(self, file_path, future, document_index=None):
+        """
+        Report the outcome of an HTML export and add it to the search index.
+        
+        Args:
+            file_path (str): The destination HTML file
+            future (Future): The finished conversion
+            document_index (DocumentIndex): The terms collected for the export
+        """
+        try:
+            future.result()
+            
+            if document_index is not None and self.search_index is not None:
+                self.search_index.add_document(os.path.abspath(file_path), document_index)
+            
+            filename = os.path.basename(file_path)
+            self.update_status(f"Exported: {filename}")
+            messagebox.showinfo("Success", f"HTML exported successfully to {filename}")
+            
+        except Exception as e:
+            messagebox.showerror("Error", f"Unable to export HTML: {str(e)}")
+    
+    def new_document_index(self):
+        """
+        Create a document index if search indexing is enabled.
+        
+        Returns:
+            DocumentIndex: A new index, or None if indexing is disabled
+        """
+        if self.build_index_var.get():
+            return DocumentIndex()
+        return None
+    
+    def open_search_index(self):
+        """Open or create the search index that exported documents are added to."""
+        index_path = filedialog.asksaveasfilename(
+            title="Open Search Index",
+            defaultextension=".sqlite",
+            confirmoverwrite=False,
+            filetypes=[
+                ("Search index", "*.sqlite"),
+                ("All files", "*.*")
+            ]
+        )
+        
+        if index_path:
+            try:
+                search_index = SearchIndex(index_path)
+            except Exception as e:
+                messagebox.showerror("Error", f"Unable to open search index: {str(e)}")
+                return
+                
+            if self.search_index is not None:
+                self.search_index.close()
+            self.search_index = search_index
+            self.build_index_var.set(True)
+            self.update_status(f"Search index: {os.path.basename(index_path)}")
+    
+    def show_search_window(self):
+        """Display a window for searching the documents in the search index."""
+        if self.search_index is None:
+            messagebox.showwarning("Warning", "Open a search index first.")
+            return
+            
+        search_window = tk.Toplevel(self.root)
+        search_window.title("Search Documents")
+        search_window.geometry("600x400")
+        
+        query_entry = tk.Entry(search_window, font=("Arial", 11))
+        query_entry.pack(fill=tk.X, padx=10, pady=10)
+        query_entry.focus_set()
+        
+        result_list = tk.Listbox(search_window, font=("Consolas", 10))
+        result_list.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+        results = []
+        
+        def run_search(event=None):
+            try:
+                results[:] = self.search_index.search(query_entry.get())
+            except Exception as e:
+                messagebox.showerror("Error", f"Unable to search: {str(e)}", parent=search_window)
+                return
+            result_list.delete(0, tk.END)
+            for result in results:
+                result_list.insert(tk.END, f"{result.title} - {result.heading} ({result.path})")
+            self.update_status(f"Search: {len(results)} result(s)")
+        
+        def open_result(event=None):
+            selection = result_list.curselection()
+            if selection:
+                result = results[selection[0]]
+                webbrowser.open(f'file://{result.path}#{result.anchor}')
+        
+        query_entry.bind('<Return>', run_search)
+        result_list.bind('<Double-Button-1>', open_result)
+        result_list.bind('<Return>', open_result)
+    
+    def toggle_inline_images(self):
+        """Toggle embedding small local images in the generated HTML as data URIs."""
+        inline = self.inline_images_var.get()
+        self.image_assets.inline_limit = IMAGE_INLINE_LIMIT if inline else 0
+        status = "enabled" if inline else "disabled"
+        self.update_status(f"Inlining images up to {IMAGE_INLINE_LIMIT // 1024} KB {status}")
+    
+    def toggle_metrics_server(self):
+        """Start or stop serving the metrics at /metrics on localhost."""
+        if self.metrics_server_var.get():
             try:
-                html_body = self.markdown_to_html(markdown_content)
-                full_html = self.generate_full_html(html_body)
+                self.metrics_server = MetricsServer(self.metrics)
+            except OSError as e:
+                self.metrics_server_var.set(False)
+                messagebox.showerror("Error", f"Unable to serve metrics: {str(e)}")
+                return
+            self.metrics_server.start()
+            self.update_status(f"Serving metrics at http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+        elif self.metrics_server is not None:
+            self.metrics_server.stop()
+            self.metrics_server = None
+            self.update_status("Metrics server stopped")
+    
+    def show_diagnostics_window(self):
+        """Display conversion latencies, throughput and cache statistics, refreshed every second."""
+        diagnostics_window = tk.Toplevel(self.root)
+        diagnostics_window.title("Diagnostics")
+        diagnostics_window.geometry("640x420")
+        
+        report = tk.Text(diagnostics_window, font=("Consolas", 10), wrap=tk.NONE)
+        report.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        previous_counters = {}
+        
+        def refresh():
+            if not diagnostics_window.winfo_exists():
+                return
                 
-                with open(file_path, 'w', encoding='utf-8') as file:
-                    file.write(full_html)
+            snapshot = self.metrics.snapshot()
+            lines = [f"{'Latency (ms)':<24}{'p50':>10}{'p95':>10}{'p99':>10}{'count':>10}"]
+            for name, (percentiles, count, total) in sorted(snapshot['histograms'].items()):
+                p50, p95, p99 = (percentiles[fraction] * 1000 for fraction in (0.5, 0.95, 0.99))
+                lines.append(f"{name:<24}{p50:>10.2f}{p95:>10.2f}{p99:>10.2f}{count:>10}")
                 
-                filename = os.path.basename(file_path)
-                self.update_status(f"Exported: {filename}")
-                messagebox.showinfo("Success", f"HTML exported successfully to {filename}")
+            lines.append("")
+            lines.append(f"{'Counter':<24}{'total':>14}{'per second':>14}")
+            interval = METRICS_REFRESH_INTERVAL / 1000
+            for name, value in sorted(snapshot['counters'].items()):
+                rate = (value - previous_counters.get(name, value)) / interval
+                lines.append(f"{name:<24}{value:>14}{rate:>14.1f}")
+            previous_counters.update(snapshot['counters'])
+            
+            lines.append("")
+            for name, value in sorted(snapshot['gauges'].items()):
+                lines.append(f"{name:<24}{value:>14}")
+            hits = snapshot['gauges'].get('render_cache_hits', 0)
+            lookups = hits + snapshot['gauges'].get('render_cache_misses', 0)
+            if lookups:
+                lines.append(f"{'render_cache_hit_rate':<24}{hits / lookups:>14.1%}")
                 
-            except Exception as e:
-                messagebox.showerror("Error", f"Unable to export HTML: {str(e)}")
+            report.config(state=tk.NORMAL)
+            report.delete(1.0, tk.END)
+            report.insert(1.0, "\n".join(lines))
+            report.config(state=tk.DISABLED)
+            diagnostics_window.after(METRICS_REFRESH_INTERVAL, refresh)
+            
+        refresh()
     
     def toggle_theme(self):
         """Toggle between light and dark preview themes."""
@@ -591,8 +2854,9 @@ class MarkdownConverter:
     
     def on_text_change(self, event=None):
         """Handle text changes in the editor for auto-save functionality."""
-        if self.auto_save_enabled and self.current_file:
-            self.save_file()
+        tab = self.current_tab()
+        if self.auto_save_enabled and tab is not None and tab.current_file:
+            self.save_file(tab)
     
     def update_status(self, message):
         """
@@ -651,6 +2915,11 @@ Ordered:
 LINKS
 [Link text](https://example.com)
 
+IMAGES
+![Alt text](images/picture.png)
+![Alt text](images/picture.png "Optional title")
+Relative paths are resolved against the document's folder.
+
 BLOCKQUOTES
 > This is a blockquote
 > It can span multiple lines
@@ -666,6 +2935,7 @@ SUPPORTED FEATURES
 - Inline and block code
 - Ordered and unordered lists
 - Links
+- Images
 - Blockquotes
 - Paragraphs
         """
@@ -695,6 +2965,7 @@ Supported Markdown Elements:
 - Code blocks and inline code
 - Lists (ordered and unordered)
 - Links
+- Images with lazy loading
 - Blockquotes
 - Paragraphs
 
@@ -703,13 +2974,40 @@ Date: July 3, 2025"""
         
         messagebox.showinfo("About", about_text)
     
-    def cleanup(self):
-        """Clean up temporary files before closing the application."""
-        if self.temp_html_file and os.path.exists(self.temp_html_file):
+    def remove_preview_file(self, tab):
+        """
+        Remove the temporary preview file of a document, if any.
+        
+        Args:
+            tab (DocumentTab): The document whose preview file is removed
+        """
+        if tab.temp_html_file and os.path.exists(tab.temp_html_file):
             try:
-                os.remove(self.temp_html_file)
+                os.remove(tab.temp_html_file)
             except:
                 pass
+        tab.temp_html_file = None
+    
+    def cleanup(self):
+        """Clean up temporary files and worker threads before closing the application."""
+        tabs = self.tabs + list(self.closed_tabs)
+        for tab in tabs:
+            for future in tab.conversions:
+                future.cancel()
+        # Wait for conversions already running, so none of them recreates a
+        # preview file after it has been removed
+        self.worker_pool.shutdown(wait=True)
+        shutdown_process_pools()
+        for tab in tabs:
+            self.remove_preview_file(tab)
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+        try:
+            self.image_assets.save()
+        except OSError:
+            pass
+        if self.search_index is not None:
+            self.search_index.close()
     
     def run(self):
         """Start the application main loop."""
@@ -27,7 +27,20 @@ def check_required_modules():
         'webbrowser': 'Browser control',
         'html': 'HTML utilities',
         'tempfile': 'Temporary file handling',
-        'datetime': 'Date and time utilities'
+        'datetime': 'Date and time utilities',
+        'threading': 'Background conversion threads',
+        'concurrent.futures': 'Conversion worker pool',
+        'gzip': 'Compressed export files',
+        'shutil': 'File permission handling',
+        'json': 'Search index serialization',
+        'sqlite3': 'Search index storage',
+        'time': 'Latency measurement',
+        'http.server': 'Metrics endpoint',
+        'socketserver': 'Threaded metrics server',
+        'base64': 'Inlined image data',
+        'mimetypes': 'Image media types',
+        'struct': 'Image header parsing',
+        'urllib.parse': 'Image path decoding'
     }
     
     missing_modules = []
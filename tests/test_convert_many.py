@@ -0,0 +1,102 @@
+"""Tests for bulk conversion with convert_many."""
+
+import os
+import pathlib
+import sys
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import markdown_converter
+from test_images import png_bytes
+
+
+class ConvertManyTest(unittest.TestCase):
+
+    SOURCES = [f'# Document {number}\n\nBody *{number}*' for number in range(40)]
+
+    def expected(self, sources):
+        return [markdown_converter.convert_markdown(source) for source in sources]
+
+    def test_results_follow_input_order(self):
+        results = list(markdown_converter.convert_many(self.SOURCES, batch_size=3))
+        self.assertEqual(results, self.expected(self.SOURCES))
+
+    def test_results_follow_input_order_on_thread_pool(self):
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(markdown_converter.convert_many(self.SOURCES, executor=executor, batch_size=3))
+        self.assertEqual(results, self.expected(self.SOURCES))
+
+    def test_results_follow_input_order_on_process_pool(self):
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            results = list(markdown_converter.convert_many(self.SOURCES, executor=executor, batch_size=7))
+        self.assertEqual(results, self.expected(self.SOURCES))
+
+    def test_empty_input(self):
+        self.assertEqual(list(markdown_converter.convert_many([])), [])
+        self.assertEqual(list(markdown_converter.convert_many(['', 'x'])), ['', '<p>x</p>'])
+
+    def test_full_documents(self):
+        result, = markdown_converter.convert_many(['# Title'], full_document=True)
+        self.assertTrue(result.startswith('<!DOCTYPE html>'))
+        self.assertIn('<h1 id="title">Title</h1>', result)
+
+
+class SourceTypesTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def test_str_bytes_and_path_sources(self):
+        path = pathlib.Path(self.directory, 'note.md')
+        path.write_text('# From file\n\nünïcode', encoding='utf-8')
+        results = list(markdown_converter.convert_many(
+            ['# From text', '# From bytes ü'.encode('utf-8'), path]))
+        self.assertEqual(results, [
+            '<h1 id="from-text">From text</h1>',
+            '<h1 id="from-bytes-ü">From bytes ü</h1>',
+            '<h1 id="from-file">From file</h1><p>ünïcode</p>',
+        ])
+
+    def test_images_resolve_against_the_source_directory(self):
+        os.mkdir(os.path.join(self.directory, 'docs'))
+        with open(os.path.join(self.directory, 'docs', 'photo.png'), 'wb') as file:
+            file.write(png_bytes(30, 20))
+        path = pathlib.Path(self.directory, 'docs', 'page.md')
+        path.write_text('![p](photo.png)', encoding='utf-8')
+
+        from_path, from_text = markdown_converter.convert_many([path, '![p](photo.png)'])
+        self.assertIn('width="30" height="20"', from_path)
+        self.assertNotIn('width=', from_text)
+
+
+class BatchCacheTest(unittest.TestCase):
+
+    def test_cache_serves_repeated_blocks(self):
+        cache = markdown_converter.RenderCache()
+        sources = ['Shared footer\n\nitem %d' % (number % 5) for number in range(2000)]
+        results = markdown_converter.MarkdownRenderer().convert_sources(sources, cache=cache)
+        self.assertEqual(results, [markdown_converter.convert_markdown(source) for source in sources])
+        self.assertTrue(cache.is_effective())
+        self.assertGreater(cache.hits, 3000)
+
+    def test_cache_is_bypassed_for_unique_blocks(self):
+        cache = markdown_converter.RenderCache()
+        sources = ['unique block %d' % number for number in range(5000)]
+        results = markdown_converter.MarkdownRenderer().convert_sources(sources, cache=cache)
+        self.assertEqual(results, [markdown_converter.convert_markdown(source) for source in sources])
+        self.assertFalse(cache.is_effective())
+        self.assertEqual(cache.hits + cache.misses, markdown_converter.CONVERT_CACHE_SAMPLE)
+
+    def test_without_cache(self):
+        sources = ['# A\n\n# A', 'text']
+        self.assertEqual(markdown_converter.MarkdownRenderer().convert_sources(sources, cache=False),
+                         [markdown_converter.convert_markdown(source) for source in sources])
+
+
+if __name__ == '__main__':
+    unittest.main()
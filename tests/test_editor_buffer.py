@@ -0,0 +1,138 @@
+"""Tests for the Python-side mirror of the editor widget."""
+
+import os
+import sys
+import tempfile
+import tkinter
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import markdown_converter
+
+
+class FakeTextWidget:
+    """
+    Stands in for a tk.Text widget with a plain Tcl command, so no display is needed.
+
+    It accepts only "line.column" indexes, which it returns unchanged.
+    """
+
+    def __init__(self):
+        self.interpreter = tkinter.Tcl()
+        self.tk = self.interpreter.tk
+        self.tk.eval('''
+            proc .text {args} {
+                if {[lindex $args 0] eq "index"} { return [lindex $args 1] }
+                return [list original {*}$args]
+            }
+        ''')
+
+    def __str__(self):
+        return '.text'
+
+
+class EditorBufferCloseTest(unittest.TestCase):
+
+    def test_close_restores_widget_command(self):
+        widget = FakeTextWidget()
+        buffer = markdown_converter.EditorBuffer(widget)
+        self.assertEqual(widget.tk.eval('info commands .text_original'), '.text_original')
+
+        buffer.close()
+        self.assertEqual(widget.tk.eval('info commands .text_original'), '')
+        self.assertEqual(widget.tk.eval('.text see end'), 'original see end')
+        self.assertIsNone(buffer.tk)
+
+    def test_close_twice_is_harmless(self):
+        buffer = markdown_converter.EditorBuffer(FakeTextWidget())
+        buffer.close()
+        buffer.close()
+
+
+class EditorBufferIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.widget = FakeTextWidget()
+        self.buffer = markdown_converter.EditorBuffer(self.widget)
+        self.addCleanup(self.buffer.close)
+        self.buffer.insert((0, 0), 'a\U0001F600b\U0001F44Dc\nplain')
+
+    def tk_index(self, line, prefix):
+        """Return the Tk index of the position after prefix on a line."""
+        if self.buffer.surrogate_columns:
+            return f'{line}.{len(prefix.encode("utf-16-le")) // 2}'
+        return f'{line}.{len(prefix)}'
+
+    def test_resolve_counts_emoji_as_one_character(self):
+        self.assertEqual(self.buffer.resolve(self.tk_index(1, 'a\U0001F600')), (0, 2))
+        self.assertEqual(self.buffer.resolve(self.tk_index(1, 'a\U0001F600b\U0001F44D')), (0, 4))
+        self.assertEqual(self.buffer.resolve(self.tk_index(1, 'a\U0001F600b\U0001F44Dc')), (0, 5))
+        self.assertEqual(self.buffer.resolve('2.3'), (1, 3))
+
+    def test_insert_after_emoji(self):
+        self.widget.tk.call('.text', 'insert', self.tk_index(1, 'a\U0001F600b'), 'X')
+        self.assertEqual(self.buffer.content(), 'a\U0001F600bX\U0001F44Dc\nplain\n')
+
+    def test_delete_emoji(self):
+        self.widget.tk.call('.text', 'delete', self.tk_index(1, 'a'), self.tk_index(1, 'a\U0001F600'))
+        self.assertEqual(self.buffer.content(), 'ab\U0001F44Dc\nplain\n')
+
+    def test_replace_across_lines(self):
+        self.widget.tk.call('.text', 'replace', self.tk_index(1, 'a\U0001F600b'), '2.2', '\U0001F680')
+        self.assertEqual(self.buffer.content(), 'a\U0001F600b\U0001F680ain\n')
+
+
+class EditorBufferSaveTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'document.md')
+        self.buffer = markdown_converter.EditorBuffer(FakeTextWidget())
+        self.addCleanup(self.buffer.close)
+        self.buffer.insert((0, 0), 'first line\nsecond line\nthird line')
+
+    def read(self):
+        with open(self.path, 'r', encoding='utf-8') as file:
+            return file.read()
+
+    def save_modes(self):
+        """Save the buffer and return the modes the file was opened with."""
+        with mock.patch('builtins.open', wraps=open) as opened:
+            self.buffer.save(self.path)
+        return [call[0][1] for call in opened.call_args_list]
+
+    def test_first_save_writes_whole_file(self):
+        self.assertEqual(self.save_modes(), ['w'])
+        self.assertEqual(self.read(), self.buffer.content())
+
+    def test_unchanged_buffer_is_not_written(self):
+        self.buffer.save(self.path)
+        self.assertEqual(self.save_modes(), [])
+
+    def test_edit_writes_whole_file(self):
+        self.buffer.save(self.path)
+        self.buffer.delete((2, 0), (2, 5))
+        self.buffer.insert((2, 0), 'last')
+        self.assertEqual(self.save_modes(), ['w'])
+        self.assertEqual(self.read(), 'first line\nsecond line\nlast line\n')
+        self.assertEqual(self.save_modes(), [])
+
+    def test_external_change_is_overwritten(self):
+        self.buffer.save(self.path)
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.write('appended elsewhere\n')
+        self.assertEqual(self.save_modes(), ['w'])
+        self.assertEqual(self.read(), self.buffer.content())
+
+    def test_save_to_another_path_writes(self):
+        self.buffer.save(self.path)
+        self.path += '.copy'
+        self.assertEqual(self.save_modes(), ['w'])
+        self.assertEqual(self.read(), self.buffer.content())
+
+
+if __name__ == '__main__':
+    unittest.main()
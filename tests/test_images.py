@@ -0,0 +1,106 @@
+"""Tests for image rendering and the image asset resolver."""
+
+import json
+import os
+import struct
+import sys
+import tempfile
+import unittest
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import markdown_converter
+
+
+def png_bytes(width, height):
+    """Build a minimal valid PNG image."""
+    def chunk(chunk_type, data):
+        return (struct.pack('>I', len(data)) + chunk_type + data
+                + struct.pack('>I', zlib.crc32(chunk_type + data)))
+    rows = b''.join(b'\0' + b'\0\0\0' * width for _ in range(height))
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(rows)) + chunk(b'IEND', b''))
+
+
+class ImageAssetsTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.write('photo.png', png_bytes(30, 20))
+
+    def write(self, name, data):
+        path = os.path.join(self.directory, name)
+        with open(path, 'wb') as file:
+            file.write(data)
+        return path
+
+    def render(self, markdown_text, image_assets=None):
+        renderer = markdown_converter.MarkdownRenderer(image_assets=image_assets)
+        return renderer.markdown_to_html(markdown_text, base_dir=self.directory)
+
+    def test_local_image_gets_dimensions(self):
+        self.assertEqual(self.render('![A photo](photo.png)'),
+                         '<p><img src="photo.png" width="30" height="20" alt="A photo" loading="lazy"></p>')
+
+    def test_small_image_is_inlined_when_enabled(self):
+        html_content = self.render('![x](photo.png)', markdown_converter.ImageAssets(inline_limit=4096))
+        self.assertIn('src="data:image/png;base64,', html_content)
+
+    def test_empty_image_is_not_inlined_when_disabled(self):
+        self.write('empty.png', b'')
+        self.assertEqual(self.render('![y](empty.png)'),
+                         '<p><img src="empty.png" alt="y" loading="lazy"></p>')
+
+    def test_cache_is_reused_across_instances(self):
+        cache_path = os.path.join(self.directory, 'cache.json')
+        image_assets = markdown_converter.ImageAssets(cache_path)
+        self.render('![x](photo.png)', image_assets)
+        image_assets.save()
+
+        reloaded = markdown_converter.ImageAssets(cache_path)
+        self.assertEqual(list(reloaded.dimensions), [os.path.join(self.directory, 'photo.png')])
+        self.assertEqual(reloaded.dimensions[os.path.join(self.directory, 'photo.png')][2:], [30, 20])
+
+    def test_malformed_cache_entries_are_ignored(self):
+        photo_path = os.path.join(self.directory, 'photo.png')
+        cache_path = os.path.join(self.directory, 'cache.json')
+        with open(cache_path, 'w', encoding='utf-8') as file:
+            json.dump({photo_path: 7, 'other': [1, 2, 'x', None], 'list': [1, 2, 3, 4]}, file)
+
+        image_assets = markdown_converter.ImageAssets(cache_path)
+        self.assertEqual(image_assets.dimensions, {'list': [1, 2, 3, 4]})
+        self.assertIn('width="30" height="20"', self.render('![x](photo.png)', image_assets))
+
+    def test_url_scheme_pattern(self):
+        for source in ('https://example.com/a.png', 'data:image/png;base64,AA', '//cdn/a.png'):
+            self.assertTrue(markdown_converter.URL_SCHEME_PATTERN.match(source), source)
+        for source in ('C:/images/a.png', 'C:\\images\\a.png', 'images/a.png', '/images/a.png'):
+            self.assertFalse(markdown_converter.URL_SCHEME_PATTERN.match(source), source)
+
+    def test_remote_image_is_left_alone(self):
+        self.assertEqual(self.render('![r](https://example.com/a.png)'),
+                         '<p><img src="https://example.com/a.png" alt="r" loading="lazy"></p>')
+
+    def test_absolute_local_path_gets_dimensions(self):
+        photo_path = os.path.join(self.directory, 'photo.png')
+        self.assertIn('width="30" height="20"', self.render(f'![x]({photo_path})'))
+
+
+class ImageRuleTest(unittest.TestCase):
+
+    def test_image_and_link_syntax_in_code_stays_text(self):
+        self.assertEqual(markdown_converter.convert_markdown('`![a](b.png)` and `[x](y)`'),
+                         '<p><code>![a](b.png)</code> and <code>[x](y)</code></p>')
+
+    def test_image_outside_code_is_rendered(self):
+        self.assertEqual(markdown_converter.convert_markdown('`code` ![a_b](c_d_e.png "t") [l](u)'),
+                         '<p><code>code</code> <img src="c&#95;d&#95;e.png" alt="a&#95;b" '
+                         'title="t" loading="lazy"> <a href="u">l</a></p>')
+
+
+if __name__ == '__main__':
+    unittest.main()
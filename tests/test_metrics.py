@@ -0,0 +1,93 @@
+"""Tests for latency histograms and the Prometheus metrics page."""
+
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import markdown_converter
+
+
+class LatencyHistogramTest(unittest.TestCase):
+
+    def histogram(self, samples, window=markdown_converter.METRICS_WINDOW):
+        histogram = markdown_converter.LatencyHistogram(window)
+        for seconds in samples:
+            histogram.record(seconds)
+        return histogram
+
+    def test_empty_window(self):
+        self.assertEqual(self.histogram([]).percentiles(), {0.5: 0.0, 0.95: 0.0, 0.99: 0.0})
+
+    def test_single_sample(self):
+        self.assertEqual(self.histogram([0.25]).percentiles(), {0.5: 0.25, 0.95: 0.25, 0.99: 0.25})
+
+    def test_nearest_rank_of_hundred_samples(self):
+        histogram = self.histogram(reversed(range(1, 101)))
+        self.assertEqual(histogram.percentiles(), {0.5: 50, 0.95: 95, 0.99: 99})
+        self.assertEqual(histogram.percentiles((0.07, 0.0, 1.0)), {0.07: 7, 0.0: 1, 1.0: 100})
+
+    def test_nearest_rank_of_few_samples(self):
+        histogram = self.histogram([3, 1, 4, 2])
+        self.assertEqual(histogram.percentiles(), {0.5: 2, 0.95: 4, 0.99: 4})
+        histogram = self.histogram([1, 2, 3])
+        self.assertEqual(histogram.percentiles((0.5,)), {0.5: 2})
+
+    def test_window_drops_old_samples_but_keeps_totals(self):
+        histogram = self.histogram([100.0] * 5 + [1.0] * 10, window=10)
+        self.assertEqual(histogram.percentiles(), {0.5: 1.0, 0.95: 1.0, 0.99: 1.0})
+        self.assertEqual(histogram.count, 15)
+        self.assertEqual(histogram.total, 510.0)
+
+
+class RenderTextTest(unittest.TestCase):
+
+    def test_empty_registry(self):
+        self.assertEqual(markdown_converter.Metrics().render_text(), '\n')
+
+    def test_exposition_format(self):
+        metrics = markdown_converter.Metrics()
+        for seconds in (0.001, 0.002, 0.003, 0.004):
+            metrics.record('convert', seconds)
+        metrics.record('save', 1.5)
+        metrics.increment('documents_converted', 3)
+        metrics.adjust_gauge('queue_depth', 2)
+        metrics.adjust_gauge('queue_depth', -1)
+        metrics.register_gauge('cache_entries', lambda: 7)
+
+        prefix = markdown_converter.METRICS_PREFIX
+        self.assertEqual(metrics.render_text().replace(prefix, 'mc_').splitlines(), [
+            '# TYPE mc_convert_seconds summary',
+            'mc_convert_seconds{quantile="0.5"} 0.002000',
+            'mc_convert_seconds{quantile="0.95"} 0.004000',
+            'mc_convert_seconds{quantile="0.99"} 0.004000',
+            'mc_convert_seconds_sum 0.010000',
+            'mc_convert_seconds_count 4',
+            '# TYPE mc_save_seconds summary',
+            'mc_save_seconds{quantile="0.5"} 1.500000',
+            'mc_save_seconds{quantile="0.95"} 1.500000',
+            'mc_save_seconds{quantile="0.99"} 1.500000',
+            'mc_save_seconds_sum 1.500000',
+            'mc_save_seconds_count 1',
+            '# TYPE mc_documents_converted_total counter',
+            'mc_documents_converted_total 3',
+            '# TYPE mc_cache_entries gauge',
+            'mc_cache_entries 7',
+            '# TYPE mc_queue_depth gauge',
+            'mc_queue_depth 1',
+        ])
+        self.assertTrue(metrics.render_text().endswith('\n'))
+
+    def test_timer_records_block_duration(self):
+        metrics = markdown_converter.Metrics()
+        with mock.patch('time.perf_counter', side_effect=[10.0, 10.25]):
+            with metrics.timer('read'):
+                pass
+        percentiles, count, total = metrics.snapshot()['histograms']['read']
+        self.assertEqual((percentiles[0.5], count, total), (0.25, 1, 0.25))
+
+
+if __name__ == '__main__':
+    unittest.main()
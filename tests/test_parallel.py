@@ -0,0 +1,49 @@
+"""Tests for parallel conversion of large documents."""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import markdown_converter
+
+
+SAMPLE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sample.md')
+
+
+class ParallelConversionTest(unittest.TestCase):
+
+    def test_parallel_output_matches_sequential(self):
+        with open(SAMPLE_PATH, 'r', encoding='utf-8') as file:
+            sample = file.read()
+        repeats = markdown_converter.PARALLEL_THRESHOLD * 11 // 10 // len(sample) + 1
+        document = '\n\n'.join([sample] * repeats)
+        blocks = markdown_converter.split_blocks(document)
+        self.assertGreater(sum(len(block) for block in blocks), markdown_converter.PARALLEL_THRESHOLD)
+
+        self.addCleanup(markdown_converter.shutdown_process_pools)
+        sequential = markdown_converter.convert_markdown(document, max_workers=1)
+        parallel = markdown_converter.convert_markdown(document, max_workers=3)
+        self.assertEqual(sequential, parallel)
+        if markdown_converter.PARALLEL_SUPPORTED:
+            pool = markdown_converter.PROCESS_POOLS[3]
+            self.assertEqual(markdown_converter.convert_markdown(document, max_workers=3), parallel)
+            self.assertIs(markdown_converter.PROCESS_POOLS[3], pool)
+
+    @unittest.skipUnless(markdown_converter.PARALLEL_SUPPORTED, 'needs Python 3.7')
+    def test_process_pool_is_reused(self):
+        self.addCleanup(markdown_converter.shutdown_process_pools)
+        pool = markdown_converter.get_process_pool(2)
+        self.assertIs(markdown_converter.get_process_pool(2), pool)
+
+        markdown_converter.shutdown_process_pools()
+        self.assertIsNot(markdown_converter.get_process_pool(2), pool)
+
+    def test_small_documents_stay_in_process(self):
+        self.assertEqual(markdown_converter.convert_markdown('# Title', max_workers=4),
+                         '<h1 id="title">Title</h1>')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+"""Tests for heading anchors and the search indexes."""
+
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import unittest
+from html.parser import HTMLParser
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import markdown_converter
+
+
+class HeadingIdParser(HTMLParser):
+    """Collects the decoded id attributes of headings."""
+
+    def __init__(self):
+        super().__init__()
+        self.ids = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ('h1', 'h2', 'h3', 'h4', 'h5', 'h6'):
+            self.ids.append(dict(attrs)['id'])
+
+
+class HeadingAnchorTest(unittest.TestCase):
+
+    MARKDOWN = '# The __init__ method\n\n## convert_many usage\n\ntext\n\n### a *b* c_d'
+
+    def test_heading_ids_are_not_rewritten_by_inline_rules(self):
+        html_content = markdown_converter.convert_markdown('## convert_many usage')
+        self.assertEqual(html_content, '<h2 id="convert&#95;many-usage">convert_many usage</h2>')
+
+    def test_rendered_ids_match_indexed_anchors(self):
+        renderer = markdown_converter.MarkdownRenderer()
+        document_index = markdown_converter.DocumentIndex()
+        html_content = ''.join(renderer.iter_html(self.MARKDOWN, document_index=document_index))
+
+        parser = HeadingIdParser()
+        parser.feed(html_content)
+        anchors = [anchor for anchor, heading in document_index.sections[1:]]
+        self.assertEqual(parser.ids, ['the-__init__-method', 'convert_many-usage', 'a-b-c_d'])
+        self.assertEqual(parser.ids, anchors)
+
+    def test_repeated_headings_get_numbered_ids(self):
+        markdown_text = '## Usage\n\ntext\n\n## Usage\n\n## Usage 1\n\n## Usage'
+        renderer = markdown_converter.MarkdownRenderer()
+        cache = markdown_converter.RenderCache()
+        for _ in range(2):
+            # The second pass is served from the render cache
+            document_index = markdown_converter.DocumentIndex()
+            html_content = ''.join(renderer.iter_html(markdown_text, cache, document_index))
+            parser = HeadingIdParser()
+            parser.feed(html_content)
+            self.assertEqual(parser.ids, ['usage', 'usage-1', 'usage-1-1', 'usage-2'])
+            self.assertEqual([anchor for anchor, heading in document_index.sections[1:]], parser.ids)
+
+    def test_convert_markdown_numbers_repeated_headings(self):
+        self.assertEqual(markdown_converter.convert_markdown('# A\n\n# A'),
+                         '<h1 id="a">A</h1><h1 id="a-1">A</h1>')
+
+
+# Minimal DOM for running the search script under node: typing a query calls
+# the input handler, and the hrefs of the result links of each query are
+# printed as a JSON array.
+SEARCH_SCRIPT_HARNESS = """
+var handlers = {};
+var box = {value: '', addEventListener: function (name, handler) { handlers[name] = handler; }};
+var results = {links: [], set innerHTML(value) { this.links = []; },
+               appendChild: function (item) { this.links.push(item.child.href); }};
+var document = {
+    getElementById: function (id) { return id === 'search-box' ? box : results; },
+    createElement: function () { return {appendChild: function (child) { this.child = child; }}; }
+};
+%s
+var output = [];
+%s.forEach(function (query) {
+    box.value = query;
+    handlers.input();
+    output.push(results.links);
+});
+console.log(JSON.stringify(output));
+"""
+
+
+class SearchScriptTest(unittest.TestCase):
+
+    def test_terms_are_serialized_as_pairs(self):
+        document_index = markdown_converter.DocumentIndex()
+        document_index.add_block('# Intro\n\nconstructor __proto__')
+        data = json.loads(document_index.to_json())
+        self.assertEqual(data['terms'], [['intro', [1]], ['constructor', [1]], ['__proto__', [1]]])
+
+    @unittest.skipUnless(shutil.which('node'), 'needs node')
+    def test_object_property_names_are_searchable_words(self):
+        document_index = markdown_converter.DocumentIndex()
+        renderer = markdown_converter.MarkdownRenderer()
+        ''.join(renderer.iter_html('# Intro\n\nwidget\n\n## Internals\n\n__proto__ widget',
+                                   document_index=document_index))
+        script = renderer.generate_search_script(document_index)
+        script = script.split('<script>', 1)[1].rsplit('</script>', 1)[0]
+
+        queries = ['widget', 'constructor', '__proto__', 'toString', 'missing']
+        output = subprocess.run(['node', '-e', SEARCH_SCRIPT_HARNESS % (script, json.dumps(queries))],
+                                stdout=subprocess.PIPE, check=True).stdout
+        self.assertEqual(json.loads(output.decode('utf-8')),
+                         [['#intro', '#internals'], [], ['#internals'], [], []])
+
+
+class FailingDocumentIndex(markdown_converter.DocumentIndex):
+    """Document index whose postings fail to insert halfway through."""
+
+    @property
+    def terms(self):
+        return {'first': {0: 1}, None: {0: 1}}
+
+    @terms.setter
+    def terms(self, value):
+        pass
+
+
+class SearchIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.search_index = markdown_converter.SearchIndex(os.path.join(directory.name, 'index.db'))
+        self.addCleanup(self.search_index.close)
+
+    def add(self, path, markdown_text, document_index=None):
+        document_index = document_index or markdown_converter.DocumentIndex()
+        document_index.add_block(markdown_text)
+        self.search_index.add_document(path, document_index)
+
+    def test_search_links_to_heading_anchor(self):
+        self.add('/docs/a.html', '# Guide\n\n## b_c\n\nwidget setup')
+        results = self.search_index.search('widget')
+        self.assertEqual([(result.anchor, result.heading) for result in results], [('b_c', 'b_c')])
+
+    def test_search_links_to_repeated_heading(self):
+        self.add('/docs/a.html', '## Usage\n\nalpha\n\n## Usage\n\nbeta')
+        self.assertEqual([result.anchor for result in self.search_index.search('beta')], ['usage-1'])
+
+    def test_reindexing_replaces_document(self):
+        self.add('/docs/a.html', '# Old\n\nalpha')
+        self.add('/docs/a.html', '# New\n\nbeta')
+        self.assertEqual(self.search_index.search('alpha'), [])
+        self.assertEqual([result.title for result in self.search_index.search('beta')], ['New'])
+
+    def test_failed_reindex_keeps_previous_version(self):
+        self.add('/docs/a.html', '# Old\n\nalpha')
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.add('/docs/a.html', '# New', FailingDocumentIndex())
+        self.assertEqual([result.title for result in self.search_index.search('alpha')], ['Old'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+"""Tests for the output sinks."""
+
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import markdown_converter
+
+
+class AtomicFileSinkTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_close_replaces_destination(self):
+        path = os.path.join(self.directory.name, 'page.html')
+        with markdown_converter.AtomicFileSink(path) as sink:
+            sink.write('<p>new</p>')
+        with open(path, 'r', encoding='utf-8') as file:
+            self.assertEqual(file.read(), '<p>new</p>')
+        self.assertEqual(os.listdir(self.directory.name), ['page.html'])
+
+    def test_new_file_gets_default_permissions(self):
+        path = os.path.join(self.directory.name, 'page.html')
+        with markdown_converter.AtomicFileSink(path) as sink:
+            sink.write('<p>new</p>')
+        self.assertEqual(os.stat(path).st_mode & 0o777, markdown_converter.NEW_FILE_MODE)
+
+    def test_existing_file_keeps_its_permissions(self):
+        path = os.path.join(self.directory.name, 'page.html')
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write('old')
+        os.chmod(path, 0o600)
+        with markdown_converter.AtomicFileSink(path, file_mode=0o664) as sink:
+            sink.write('<p>new</p>')
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o600)
+
+    def test_configured_mode_for_new_file(self):
+        path = os.path.join(self.directory.name, 'page.html')
+        with markdown_converter.AtomicFileSink(path, file_mode=0o600) as sink:
+            sink.write('<p>new</p>')
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o600)
+
+    def test_temporary_file_does_not_follow_symlinks(self):
+        path = os.path.join(self.directory.name, 'page.html')
+        target = os.path.join(self.directory.name, 'target')
+        with open(target, 'w', encoding='utf-8') as file:
+            file.write('keep')
+        # A link planted at the name the temporary file used to have
+        planted = os.path.join(self.directory.name,
+                               f'.page.html.{os.getpid()}.{threading.get_ident()}.tmp')
+        os.symlink(target, planted)
+
+        sink = markdown_converter.AtomicFileSink(path)
+        self.assertFalse(os.path.islink(sink.temp_path))
+        self.assertEqual(os.path.dirname(sink.temp_path), os.path.dirname(os.path.abspath(path)))
+        sink.write('<p>new</p>')
+        sink.close()
+        with open(target, 'r', encoding='utf-8') as file:
+            self.assertEqual(file.read(), 'keep')
+
+    def test_failed_commit_removes_temporary_file(self):
+        # Replacing a directory with a file fails after the data was written
+        path = os.path.join(self.directory.name, 'page.html')
+        os.mkdir(path)
+        with self.assertRaises(OSError):
+            with markdown_converter.AtomicFileSink(path) as sink:
+                sink.write('<p>new</p>')
+        self.assertEqual(os.listdir(self.directory.name), ['page.html'])
+
+    def test_failed_commit_in_render_to_sink_removes_temporary_file(self):
+        path = os.path.join(self.directory.name, 'page.html')
+        os.mkdir(path)
+        renderer = markdown_converter.MarkdownRenderer()
+        with self.assertRaises(OSError):
+            renderer.render_to_sink(lambda: markdown_converter.AtomicFileSink(path), '# Title')
+        self.assertEqual(os.listdir(self.directory.name), ['page.html'])
+
+
+if __name__ == '__main__':
+    unittest.main()